@@ -0,0 +1,67 @@
+"""
+Cold-start import latency of the toolbox (`mainwindow`) and of the Qt-free `core`
+modules, each measured in a fresh interpreter, plus which heavy optional packages
+the import pulled in (they should only load when their feature is used).
+
+Run from the repository root:
+    python -m benchmarks.bench_import
+"""
+import os
+import subprocess
+import sys
+import time
+
+TARGETS = (
+    "core.points",
+    "core.polynomial",
+    "core.pointwise",
+    "core.resampling",
+    "core.cli",
+    "core.batch",
+    "mainwindow",
+)
+
+HEAVY = ("PySide6", "matplotlib", "scipy", "thirdparty")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_import(module):
+    """
+    Import `module` in a new interpreter with -X importtime.
+    Returns (wall seconds, cumulative import seconds of the module, heavy packages loaded).
+    """
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.splitlines()[-1]}")
+
+    cumulative = 0.0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1]) / 1e6
+    return wall, cumulative, result.stdout.strip()
+
+
+def main(repeats=5):
+    baseline = min(cold_import("os")[0] for _ in range(repeats))
+    print(f"interpreter start: {baseline:.3f} s")
+    print(f"{'module':>16} {'wall [s]':>10} {'import [s]':>11}  heavy packages loaded")
+    for module in TARGETS:
+        try:
+            runs = [cold_import(module) for _ in range(repeats)]
+        except RuntimeError as e:
+            print(f"{module:>16} {'failed':>10}  {e}")
+            continue
+        wall = min(run[0] for run in runs)
+        cumulative = min(run[1] for run in runs)
+        print(f"{module:>16} {wall:>10.3f} {cumulative:>11.3f}  {runs[0][2] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
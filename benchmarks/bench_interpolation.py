@@ -0,0 +1,43 @@
+"""
+Throughput of the resampling interpolation kernels at several scene sizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_interpolation
+"""
+import time
+
+import numpy as np
+
+from core.interpolation import INTERPOLATION_KERNELS
+
+
+def bench_kernel(kernel, image, x, y, repeats=3):
+    """
+    Best-of-`repeats` wall time of one kernel call over all points.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        kernel(image, x, y)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes=(256, 1024, 2048), seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, size=(4096, 4096, 3), dtype=np.uint8)
+
+    print(f"{'kernel':>10} {'size':>10} {'time [s]':>10} {'Mpx/s':>10}")
+    for size in sizes:
+        # A slightly rotated and scaled sampling grid, like a real warp.
+        rows, cols = np.mgrid[0:size, 0:size].astype(np.float64)
+        x = (100.0 + 0.9 * cols + 0.1 * rows).ravel()
+        y = (100.0 - 0.1 * cols + 0.9 * rows + size * 0.1).ravel()
+
+        for name, (kernel, _) in INTERPOLATION_KERNELS.items():
+            elapsed = bench_kernel(kernel, image, x, y)
+            print(f"{name:>10} {f'{size}x{size}':>10} {elapsed:>10.4f} {x.size / elapsed / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
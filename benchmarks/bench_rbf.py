@@ -0,0 +1,56 @@
+"""
+Dense multiquadratic (MQ) against compactly supported RBF (CSRBF) interpolation
+of pointwise residuals, for growing numbers of control points.
+
+Run from the repository root:
+    python -m benchmarks.bench_rbf
+"""
+import time
+
+import numpy as np
+
+from core.points import PointSet
+from core.pointwise import Pointwise
+
+METHODS = {"MQ": "mq_interpolate", "CSRBF": "csrbf_interpolate"}
+
+
+def residual_field(xy):
+    """A smooth synthetic residual field to interpolate."""
+    return np.sin(xy[:, 0] / 120.0) + np.cos(xy[:, 1] / 170.0)
+
+
+def bench_method(method, gcps, queries):
+    """
+    Fit time (factorization + solve) and query time of one method on fresh instances,
+    and the mean absolute error against the true field at the queries.
+    """
+    values = residual_field(gcps.image_xy)
+    pointwise = Pointwise(gcps, None, values, values, values, values)
+    interpolate = getattr(pointwise, METHODS[method])
+
+    start = time.perf_counter()
+    interpolate(gcps.image_xy[:1])
+    fit = time.perf_counter() - start
+
+    start = time.perf_counter()
+    estimate = interpolate(queries)[:, 0]
+    query = time.perf_counter() - start
+    return fit, query, float(np.abs(estimate - residual_field(queries)).mean())
+
+
+def main(sizes=(500, 1000, 2000, 4000), num_queries=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    queries = rng.uniform(0, 2000, size=(num_queries, 2))
+
+    print(f"{'method':>8} {'GCPs':>8} {'fit [s]':>10} {'query [s]':>10} {'mean err':>10}")
+    for size in sizes:
+        data = rng.uniform(0, 2000, size=(size, 5))
+        gcps = PointSet(data)
+        for method in METHODS:
+            fit, query, error = bench_method(method, gcps, queries)
+            print(f"{method:>8} {size:>8} {fit:>10.4f} {query:>10.4f} {error:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Batch mode: run many scenes, each with its own point file, on a process pool.
+
+    python -m core.batch manifest.json [--workers 4] [--retries 2] [--state batch.state.json]
+
+The manifest is a JSON list of jobs, or an object {"defaults": {...}, "output_dir": ...,
+"jobs": [...]}, or a CSV file with one job per row. Every job needs "image" and "points"
+and may set any key of `core.cli.JOB_DEFAULTS` (typically "degree" and "step", the GSD).
+Relative paths are taken relative to the manifest.
+
+Progress is kept in a JSON state file after every job, so running the same manifest
+again skips the finished scenes. An interrupted scene resumes its tiled output only if
+its model, image and resampling settings are unchanged; an edited scene starts over.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from core.cli import JOB_DEFAULTS, load_job
+
+_progress_queue = None
+
+
+INT_KEYS = ("degree", "workers", "tile_size", "chunk_size", "warp_grid", "warp_order",
+            "correction_spacing", "correction_n")
+FLOAT_KEYS = ("step", "warp_tolerance", "correction_r")
+
+
+def _parse_text_value(job_id, key, text):
+    """
+    Convert a manifest value given as text (every CSV cell is) to the type of its job key.
+    "icp_ids" is a comma-separated id list and "robust" a JSON object.
+    """
+    try:
+        if key in INT_KEYS:
+            return int(text)
+        if key in FLOAT_KEYS:
+            return float(text)
+        if key == "icp_ids":
+            return [int(i) for i in text.replace(";", ",").split(",") if i.strip()]
+        if key == "robust":
+            value = json.loads(text)
+            if not isinstance(value, dict):
+                raise ValueError("expected a JSON object")
+            return value
+    except ValueError as e:
+        raise ValueError(f"Manifest job {job_id}: invalid {key} {text!r} ({e})") from None
+    if not isinstance(JOB_DEFAULTS[key], (str, type(None))):
+        raise ValueError(f"Manifest job {job_id}: {key} cannot be given as text")
+    return text
+
+
+def load_manifest(path):
+    """
+    Read a JSON or CSV manifest into a list of complete job dicts, each with a unique "id".
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    defaults, output_dir = {}, base
+    with open(path, "r", newline="") as file:
+        if path.lower().endswith(".csv"):
+            entries = [{key: value for key, value in row.items() if value not in (None, "")}
+                       for row in csv.DictReader(file)]
+        else:
+            manifest = json.load(file)
+            if isinstance(manifest, dict):
+                defaults = manifest.get("defaults", {})
+                output_dir = os.path.join(base, manifest.get("output_dir", "."))
+                entries = manifest["jobs"]
+            else:
+                entries = manifest
+
+    jobs, seen = [], set()
+    for index, entry in enumerate(entries):
+        entry = dict(defaults, **entry)
+        missing = {"image", "points"} - set(entry)
+        if missing:
+            raise ValueError(f"Manifest job {index}: missing {', '.join(sorted(missing))}")
+
+        job_id = str(entry.pop("id", os.path.splitext(os.path.basename(entry["image"]))[0]))
+        if job_id in seen:
+            job_id = f"{job_id}-{index}"
+        seen.add(job_id)
+
+        image = os.path.join(base, entry.pop("image"))
+        points = os.path.join(base, entry.pop("points"))
+        entry.setdefault("output", os.path.join(output_dir, job_id + "_resampled.npy"))
+        entry["output"] = os.path.join(base, entry["output"])
+        # One resampling thread per scene; the pool parallelizes across scenes
+        entry.setdefault("workers", 1)
+
+        unknown = set(entry) - set(JOB_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Manifest job {job_id}: unknown keys {', '.join(sorted(unknown))}")
+        for key, value in entry.items():
+            if isinstance(value, str):
+                entry[key] = _parse_text_value(job_id, key, value)
+        job = load_job(**entry)
+        job.update(id=job_id, image=image, points=points)
+        jobs.append(job)
+    return jobs
+
+
+def init_batch_worker(progress_queue):
+    """Process-pool initializer: keep the queue the workers report progress through."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_batch_job(job):
+    """
+    Run one scene in a pool worker. Returns (job id, report, error text); exceptions are
+    turned into text so every failure reaches the scheduler the same way.
+    """
+    from core.cli import run_job
+
+    def progress(percent):
+        if _progress_queue is not None:
+            _progress_queue.put((job["id"], percent))
+
+    spec = {key: value for key, value in job.items() if key in JOB_DEFAULTS}
+    try:
+        return job["id"], run_job(job["points"], job["image"], spec, progress_callback=progress), None
+    except Exception:
+        return job["id"], None, traceback.format_exc()
+
+
+class BatchScheduler:
+    """
+    Runs a list of scene jobs on a process pool with retries and a resumable state file.
+
+    The state file maps every job id to its status ("pending", "done" or "failed"), the
+    attempts made, the job spec it ran with, and its report or last error. A job is
+    skipped on the next run only if it is done *with the same spec*.
+    """
+
+    def __init__(self, jobs, state_path, workers=None, retries=1, progress_callback=None):
+        """
+        :param jobs: Job dicts as returned by `load_manifest`
+        :param state_path: JSON state file, created or resumed
+        :param workers: Scenes processed at once (defaults to one per CPU core)
+        :param retries: Extra attempts for a failed scene
+        :param progress_callback: Called as callback(job_id, percent) in the calling process
+        """
+        from core.parallel import default_workers
+
+        self.jobs = {job["id"]: job for job in jobs}
+        self.state_path = state_path
+        self.workers = default_workers() if workers is None else workers
+        self.retries = retries
+        self.progress_callback = progress_callback
+        self.state = self.load_state()
+
+    def load_state(self):
+        state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r") as file:
+                state = json.load(file)
+        for job_id, job in self.jobs.items():
+            entry = state.get(job_id)
+            if entry is None or entry.get("job") != job:
+                state[job_id] = {"status": "pending", "attempts": 0, "job": job}
+            elif entry["status"] == "failed":
+                # A new run gives failed scenes a fresh retry budget
+                entry.update(status="pending", attempts=0)
+        return state
+
+    def save_state(self):
+        temporary = self.state_path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temporary, self.state_path)
+
+    def run(self, cancel_flag=None):
+        """
+        Process every pending job. Returns a summary dict with the "done", "failed" and
+        "skipped" counts, "elapsed_seconds" and the throughput in "scenes_per_hour".
+        """
+        from core.parallel import make_executor
+
+        pending = [job_id for job_id in self.jobs if self.state[job_id]["status"] == "pending"]
+        skipped = len(self.jobs) - len(pending)
+        self.save_state()
+
+        start = time.perf_counter()
+        counts = {"done": 0, "failed": 0}
+        manager = multiprocessing.Manager() if self.progress_callback else None
+        queue = manager.Queue() if manager else None
+
+        try:
+            while pending and not (cancel_flag and cancel_flag()):
+                in_flight = {}
+                try:
+                    with make_executor("process", self.workers, init_batch_worker, (queue,)) as pool:
+                        while (pending or in_flight) and not (cancel_flag and cancel_flag()):
+                            while pending and len(in_flight) < self.workers:
+                                future = pool.submit(run_batch_job, self.jobs[pending[0]])
+                                job_id = pending.pop(0)
+                                self.state[job_id]["attempts"] += 1
+                                in_flight[future] = job_id
+
+                            finished, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                            self._drain_progress(queue)
+                            self._collect(finished, in_flight, pending, counts, start)
+                    # Cancelled: leaving the pool waited for the running scenes, keep them
+                    self._collect(list(in_flight), in_flight, pending, counts, start)
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. out of memory); charge the scenes it may have held,
+                    # but keep any that completed before the pool noticed
+                    for future, job_id in in_flight.items():
+                        if future.done() and future.exception() is None:
+                            self._finish(*future.result(), pending, counts, start)
+                        else:
+                            self._finish(job_id, None, f"Worker process died: {e}", pending, counts, start)
+        finally:
+            if manager is not None:
+                manager.shutdown()
+
+        done, failed = counts["done"], counts["failed"]
+        elapsed = time.perf_counter() - start
+        summary = {
+            "done": done,
+            "failed": failed,
+            "skipped": skipped,
+            "remaining": len(pending),
+            "elapsed_seconds": elapsed,
+            "scenes_per_hour": 3600.0 * done / elapsed if elapsed > 0 else 0.0,
+        }
+        print(f"Batch finished: {done} done, {failed} failed, {skipped} skipped, "
+              f"{summary['scenes_per_hour']:.1f} scenes/hour")
+        return summary
+
+    def _collect(self, futures, in_flight, pending, counts, start):
+        """
+        Record the scenes of the completed `futures` and drop them from `in_flight`.
+        The results of a batch are all taken before a broken pool is reported, so
+        scenes that finished alongside the crash are not charged for it.
+        """
+        broken = None
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                broken = broken or error
+                continue
+            del in_flight[future]
+            self._finish(*future.result(), pending, counts, start)
+        if broken is not None:
+            raise broken
+
+    def _finish(self, job_id, report, error, pending, counts, start):
+        """Record one attempt, requeueing the scene while retries remain."""
+        entry = self.state[job_id]
+        if error is None:
+            entry.update(status="done", report=report)
+            entry.pop("error", None)
+            counts["done"] += 1
+        else:
+            entry["error"] = error
+            if entry["attempts"] <= self.retries:
+                print(f"Scene {job_id} failed (attempt {entry['attempts']}), retrying.")
+                pending.append(job_id)
+            else:
+                entry["status"] = "failed"
+                counts["failed"] += 1
+                print(f"Scene {job_id} failed after {entry['attempts']} attempts:\n{error}")
+        self.save_state()
+
+        hours = (time.perf_counter() - start) / 3600.0
+        print(f"{counts['done'] + counts['failed']}/{len(self.jobs)} scenes processed, "
+              f"{counts['done'] / hours if hours > 0 else 0.0:.1f} scenes/hour")
+
+    def _drain_progress(self, queue):
+        while queue is not None and not queue.empty():
+            job_id, percent = queue.get()
+            self.progress_callback(job_id, percent)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.batch",
+                                     description="Fit and resample many scenes on a process pool.")
+    parser.add_argument("manifest", help="JSON or CSV manifest of (image, points, degree, step) jobs")
+    parser.add_argument("--state", help="state file (defaults to MANIFEST.state.json)")
+    parser.add_argument("--workers", type=int, help="scenes processed at once")
+    parser.add_argument("--retries", type=int, default=1, help="extra attempts for a failed scene")
+    parser.add_argument("--quiet", action="store_true", help="no per-scene progress")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    reported = {}
+
+    def progress(job_id, percent):
+        if int(percent) // 10 > reported.get(job_id, -1):
+            reported[job_id] = int(percent) // 10
+            print(f"{job_id}: {percent:.0f}%")
+
+    scheduler = BatchScheduler(jobs, args.state or args.manifest + ".state.json",
+                               workers=args.workers, retries=args.retries,
+                               progress_callback=None if args.quiet else progress)
+    summary = scheduler.run()
+    return 0 if summary["failed"] == 0 and summary["remaining"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
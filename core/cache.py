@@ -0,0 +1,239 @@
+"""
+Content-addressed on-disk cache of resampled products.
+
+A product is stored as `<key>.npy`, where the key hashes everything the output depends
+on: the forward/backward coefficients, normalization factors, degree, GSD, interpolation
+kernel, the mapping options (warp grid, pointwise correction) and a fingerprint of the
+source image. Hits are returned as read-only memory maps. A product being computed lives
+in `<key>.partial.npy` (resumable, see `open_tiled_output`) until `commit` renames it;
+the run computing it holds the exclusive `<key>.lock` meanwhile. The cache is bounded in bytes and evicts the least
+recently used products first, skipping locked ones.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from core.image_source import open_image_source
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "geometric_regressor", "resampling")
+DEFAULT_CACHE_BYTES = 8 << 30
+# Bytes hashed from the start, middle and end of an image file for its fingerprint
+FINGERPRINT_SAMPLE = 1 << 20
+# A lock older than this is taken to be left over from a crashed run
+STALE_LOCK_SECONDS = 24 * 3600
+
+
+def _array_digest(array, digest):
+    array = np.ascontiguousarray(array)
+    digest.update(json.dumps([array.dtype.str, list(array.shape)]).encode())
+    digest.update(array.reshape(-1).view(np.uint8))
+
+
+def file_fingerprint(path):
+    """
+    Fingerprint of an image file: its size and modification time plus samples of its
+    content, so large scenes are not read in full. An ENVI header next to it is included.
+    """
+    digest = hashlib.sha1()
+    stat = os.stat(path)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as file:
+        for position in (0, max(stat.st_size // 2 - FINGERPRINT_SAMPLE // 2, 0),
+                         max(stat.st_size - FINGERPRINT_SAMPLE, 0)):
+            file.seek(position)
+            digest.update(file.read(FINGERPRINT_SAMPLE))
+    header = os.path.splitext(path)[0] + ".hdr"
+    if os.path.exists(header):
+        with open(header, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def image_fingerprint(image):
+    """
+    Fingerprint of any image `open_image_source` accepts: paths and file-backed sources
+    by their file, in-memory images (arrays, QImages) by a hash of their pixels.
+    """
+    if isinstance(image, (str, os.PathLike)):
+        return file_fingerprint(os.fspath(image))
+    source = open_image_source(image)
+    path = getattr(source, "path", None)
+    if path is not None:
+        layout = json.dumps(getattr(source, "layout", None), default=str, sort_keys=True)
+        return hashlib.sha1((file_fingerprint(path) + layout).encode()).hexdigest()
+    digest = hashlib.sha1()
+    _array_digest(source.read_window(0, source.height, 0, source.width), digest)
+    return digest.hexdigest()
+
+
+def model_digest(resampling):
+    """
+    Digest of the polynomial model a Resampling maps with: its degree, normalization
+    factors and forward/backward coefficients.
+    """
+    digest = hashlib.sha1()
+    factors = resampling.normalization_factors
+    digest.update(json.dumps({
+        "degree": int(resampling.degree),
+        "normalization": {name: float(value) for name, value in sorted(factors.items())},
+    }, sort_keys=True).encode())
+    for coeffs in (*resampling.forward_coeffs, *resampling.backward_coeffs):
+        _array_digest(np.asarray(coeffs, dtype=np.float64), digest)
+    return digest.hexdigest()
+
+
+def resampling_key(resampling, step, image=None, **mapping):
+    """
+    Cache key of the product `resampling.resample(step, **mapping)` would compute.
+    `mapping` are the mapping options (see `core.resampling.MAPPING_DEFAULTS`; missing
+    ones take their defaults there); tiling and worker settings do not change the output
+    and are not taken. `image` is what the Resampling was opened from (a path is
+    fingerprinted from its file); by default the source's pixels or file are used. With a
+    pointwise correction the GCPs are part of the key as well.
+    """
+    from core.resampling import mapping_options
+
+    mapping = mapping_options(**mapping)
+    # Settings of a disabled warp grid or correction do not change the output
+    if not mapping["warp_grid"]:
+        mapping.update(warp_tolerance=None, warp_order=None)
+    if not mapping["correction"]:
+        mapping.update(correction_spacing=None, correction_n=None, correction_r=None)
+
+    digest = hashlib.sha1()
+    digest.update(json.dumps({
+        "version": CACHE_VERSION,
+        "model": model_digest(resampling),
+        "step": float(step),
+        "mapping": mapping,
+        "image": resampling.source_fingerprint() if image is None else image_fingerprint(image),
+    }, default=str, sort_keys=True).encode())
+    if mapping["correction"]:
+        _array_digest(resampling.gcp_points.data, digest)
+    return digest.hexdigest()
+
+
+class ResamplingCache:
+    """
+    A directory of resampled products addressed by `resampling_key`, kept below
+    `max_bytes` by evicting the least recently used products (and abandoned partials).
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        :param directory: Cache directory (created if needed); defaults to DEFAULT_CACHE_DIR
+        :param max_bytes: Size bound of the whole cache directory
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def product_path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def partial_path(self, key):
+        """Where a product is written while it is computed (resumable after a cancel)."""
+        return os.path.join(self.directory, key + ".partial.npy")
+
+    def lock_path(self, key):
+        return os.path.join(self.directory, key + ".lock")
+
+    @contextlib.contextmanager
+    def lock(self, key, cancel_flag=None, poll=0.25):
+        """
+        Hold the exclusive lock of `key` for the duration of the block, so only one run
+        computes a product and `evict` (called by any process sharing the directory)
+        leaves its partial alone. While another run holds the lock this waits for it; a
+        stale lock is broken. Yields True once locked, or False if `cancel_flag` fired
+        while waiting. After waiting, check `get` first: the other run may have
+        committed the product.
+        """
+        path = self.lock_path(key)
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if not self.locked(key):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+                    continue
+                if cancel_flag and cancel_flag():
+                    yield False
+                    return
+                time.sleep(poll)
+        with os.fdopen(fd, "w") as file:
+            file.write(str(os.getpid()))
+        try:
+            yield True
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def locked(self, key):
+        """True if `key` is being computed, i.e. it has a lock that is not stale."""
+        try:
+            age = time.time() - os.stat(self.lock_path(key)).st_mtime
+        except FileNotFoundError:
+            return False
+        return age < STALE_LOCK_SECONDS
+
+    def get(self, key):
+        """
+        The cached product as a read-only memory map, or None on a miss.
+        A hit marks the product as recently used.
+        """
+        path = self.product_path(key)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        return np.load(path, mmap_mode="r")
+
+    def commit(self, key):
+        """
+        Publish a finished partial product under its key, evict down to the size bound
+        and return the product as a memory map.
+        """
+        os.replace(self.partial_path(key), self.product_path(key))
+        self.evict(keep=key)
+        return self.get(key)
+
+    def entries(self):
+        """
+        {key: (bytes, last use)} of everything in the cache, partial products included.
+        """
+        entries = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(path):
+                continue
+            key = name.split(".", 1)[0]
+            stat = os.stat(path)
+            size, used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+        return entries
+
+    def evict(self, keep=None):
+        """
+        Delete least recently used entries until the cache fits in `max_bytes`. Entries
+        being computed (see `lock`) are kept. Returns the evicted keys.
+        """
+        entries = self.entries()
+        total = sum(size for size, _ in entries.values())
+        evicted = []
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self.locked(key):
+                continue
+            for name in os.listdir(self.directory):
+                if name.split(".", 1)[0] == key:
+                    os.remove(os.path.join(self.directory, name))
+            total -= size
+            evicted.append(key)
+        return evicted
@@ -0,0 +1,208 @@
+"""
+Headless entry point: fit the polynomial model to a point file, optionally add the
+pointwise correction field, and resample an image to a `.npy` raster, without Qt.
+
+    python -m core.cli POINTS IMAGE [--job job.json] [--degree 3] [--output out.npy] ...
+
+The job spec is a JSON object with any of the keys of `JOB_DEFAULTS`; command-line
+options override it. The JSON report is the only output on stdout; progress and log
+messages go to stderr. Only argparse and json are imported at startup, NumPy and the
+resampling code are loaded when a job actually runs.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+JOB_DEFAULTS = {
+    "degree": 2,
+    "method": "lstsq",          # "lstsq", "ransac", "huber" or "tukey"
+    "robust": {},               # options of core.robust.ransac / irls
+    "icp_ids": [],              # point ids kept out of the fit as check points
+    "correction": None,         # None, "MQ", "CSRBF" or "LDW"
+    "correction_spacing": 32,
+    "correction_n": 4,
+    "correction_r": 2,
+    "step": 1.0,
+    "output": "resampled_grid.npy",
+    "report": None,             # optional path of the JSON report
+    "tile_size": 1024,
+    "chunk_size": 500,
+    "workers": None,            # defaults to one per CPU core
+    "executor": "thread",
+    "warp_grid": None,
+    "warp_tolerance": 0.1,
+    "warp_order": 1,
+    "interpolation": "bilinear",
+}
+
+
+def load_job(path=None, **overrides):
+    """
+    Merge the defaults, the JSON job spec at `path` and the non-None `overrides`.
+    """
+    job = dict(JOB_DEFAULTS)
+    if path is not None:
+        with open(path, "r") as file:
+            spec = json.load(file)
+        unknown = set(spec) - set(JOB_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown job keys: {', '.join(sorted(unknown))}")
+        job.update(spec)
+    job.update({key: value for key, value in overrides.items() if value is not None})
+    return job
+
+
+def fit(points, job):
+    """
+    Fit the forward and backward polynomials on the GCPs of `points` and store them in
+    the Project singleton, as `perform_regression` does in the toolbox.
+    Returns the Polynomial and a report dict.
+    """
+    from core.polynomial import Polynomial
+    from core.project import Project
+
+    gcp_points, icp_points = points.gcps(), points.icps()
+    if len(gcp_points) == 0:
+        raise ValueError("No GCP points for regression.")
+
+    polynomial = Polynomial(gcp_points, job["degree"])
+    fx, fy, bx, by = polynomial.regress_polynomial(job["method"], **job["robust"])
+
+    project = Project.get_instance()
+    project.forward_coeffs = (fx, fy)
+    project.backward_coeffs = (bx, by)
+    project.normalization_factor = polynomial.normalization_factors
+    project.degree = job["degree"]
+    project.gcp_points = gcp_points
+    project.icp_points = icp_points
+
+    predicted_x, predicted_y = polynomial.evaluate((fx, fy), gcp_points, forward=True)
+    predicted_X, predicted_Y = polynomial.evaluate((bx, by), gcp_points, forward=False)
+    project.set_displacement_values(predicted_x - gcp_points.x, predicted_y - gcp_points.y,
+                                    predicted_X - gcp_points.X, predicted_Y - gcp_points.Y)
+
+    diagnostics = polynomial.residual_diagnostics(forward=True)
+    report = {
+        "degree": job["degree"],
+        "method": job["method"],
+        "gcps": len(gcp_points),
+        "icps": len(icp_points),
+        "gcp_loo_rmse": diagnostics["loo_rmse"].tolist(),
+        "suspect_gcps": gcp_points.ids[diagnostics["blunders"]].tolist(),
+    }
+    if job["method"] != "lstsq":
+        report["rejected_gcps"] = gcp_points.ids[polynomial.forward_weights == 0].tolist()
+
+    if len(icp_points):
+        forward = polynomial.evaluate((fx, fy), icp_points, forward=True)
+        backward = polynomial.evaluate((bx, by), icp_points, forward=False)
+        report["icp_rmse_forward"] = [float(v) for v in polynomial.rmse(*forward, icp_points.x, icp_points.y)]
+        report["icp_rmse_backward"] = [float(v) for v in polynomial.rmse(*backward, icp_points.X, icp_points.Y)]
+    return polynomial, report
+
+
+def run_job(points_path, image_path, job, progress_callback=None):
+    """
+    Load the points, fit, and resample `image_path` into `job["output"]`.
+    Returns the report dict (also written to `job["report"]` when set).
+    """
+    import numpy as np
+    from core.parallel import default_workers
+    from core.points import load_point_file
+    from core.project import Project
+    from core.resampling import MAPPING_DEFAULTS, Resampling
+
+    if os.path.realpath(job["output"]) == os.path.realpath(image_path):
+        raise ValueError(f"The output {job['output']} would overwrite the input image.")
+
+    start = time.perf_counter()
+    points = load_point_file(points_path, icp=False)
+    points.icp[:] = np.isin(points.ids, job["icp_ids"])
+    polynomial, report = fit(points, job)
+
+    project = Project.get_instance()
+    project.image_path = image_path
+    project.gcp_filepath = points_path
+
+    resampling = Resampling(image=image_path, gcp_points=points.gcps(),
+                            icp_points=points.icps(), degree=job["degree"])
+    resampled = resampling.resample(
+        step=job["step"],
+        progress_callback=progress_callback,
+        chunk_size=job["chunk_size"],
+        tile_size=job["tile_size"],
+        output_path=job["output"],
+        workers=default_workers() if job["workers"] is None else job["workers"],
+        executor=job["executor"],
+        **{key: job[key] for key in MAPPING_DEFAULTS},
+    )
+
+    report.update({
+        "output": job["output"],
+        "shape": list(resampled.shape),
+        "correction": job["correction"],
+        "correction_cost": resampling.correction_cost,
+        "warp_grid_max_error": None if resampling.warp_grid is None else float(resampling.warp_grid.max_error),
+        "seconds": time.perf_counter() - start,
+    })
+    if job["report"]:
+        with open(job["report"], "w") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="Fit the polynomial model to a point file and resample an image, without the GUI."
+    )
+    parser.add_argument("points", help="point file (id x y X Y [Z] per row)")
+    parser.add_argument("image", help="image to resample (.npy, raw/ENVI; other formats need PySide6)")
+    parser.add_argument("--job", help="JSON job spec (keys as in core.cli.JOB_DEFAULTS)")
+    parser.add_argument("--degree", type=int)
+    parser.add_argument("--method", choices=("lstsq", "ransac", "huber", "tukey"))
+    parser.add_argument("--icp-ids", type=lambda text: [int(i) for i in text.split(",") if i],
+                        help="comma-separated ids of the check points")
+    parser.add_argument("--correction", choices=("MQ", "CSRBF", "LDW"))
+    parser.add_argument("--step", type=float, help="output ground sampling distance")
+    parser.add_argument("--output", help="output .npy raster")
+    parser.add_argument("--report", help="write the JSON report here")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--executor", choices=("thread", "process"))
+    parser.add_argument("--interpolation", choices=("nearest", "bilinear", "bicubic", "lanczos"))
+    parser.add_argument("--tile-size", type=int)
+    parser.add_argument("--warp-grid", type=int, help="warp grid node spacing in output pixels")
+    parser.add_argument("--warp-tolerance", type=float, help="largest warp grid error in image pixels")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        job = load_job(args.job, degree=args.degree, method=args.method, icp_ids=args.icp_ids,
+                       correction=args.correction, step=args.step, output=args.output,
+                       report=args.report, workers=args.workers, executor=args.executor,
+                       interpolation=args.interpolation, tile_size=args.tile_size,
+                       warp_grid=args.warp_grid, warp_tolerance=args.warp_tolerance)
+        reported = [-1]
+
+        def progress(percent):
+            if int(percent) // 10 > reported[0]:
+                reported[0] = int(percent) // 10
+                print(f"Resampling: {percent:.0f}%", file=sys.stderr)
+
+        # Log output goes to stderr, so stdout carries only the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_job(args.points, args.image, job, progress_callback=progress)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import numpy as np
+
+from core.points import as_point_set
+from core.polynomial import CompiledTransform, Polynomial, num_terms
+
+CRITERIA = ("icp_rmse", "loo_rmse", "aic", "bic")
+
+
+def term_offset(i, j, degree):
+    """
+    Column of the term x^i * y^j in the i-then-j order of `design_matrix`.
+    """
+    return i * (degree + 1) - i * (i - 1) // 2 + j
+
+
+class IncrementalQR:
+    """
+    Thin QR factorization A = Q R that grows by appending blocks of columns.
+    Each new block is orthogonalized against the current Q with classical Gram-Schmidt
+    applied twice (enough for numerical orthogonality), so the earlier columns are
+    never refactored.
+    """
+
+    def __init__(self, num_rows):
+        self.Q = np.empty((num_rows, 0))
+        self.R = np.empty((0, 0))
+
+    def append(self, block, rtol=1e-10):
+        """
+        Append the columns of `block` (M x k).
+        Returns False, leaving the factorization unchanged, if the new columns are
+        numerically dependent on the existing ones (or on each other).
+        """
+        block = np.asarray(block, dtype=np.float64)
+        coupling = self.Q.T @ block
+        residual = block - self.Q @ coupling
+        correction = self.Q.T @ residual
+        residual -= self.Q @ correction
+        coupling += correction
+
+        q_new, r_new = np.linalg.qr(residual)
+        scale = max(np.abs(np.diag(self.R)).max(initial=0.0), np.linalg.norm(block, axis=0).max())
+        if np.abs(np.diag(r_new)).min(initial=np.inf) <= rtol * scale:
+            return False
+
+        size = self.R.shape[0]
+        R = np.zeros((size + block.shape[1],) * 2)
+        R[:size, :size] = self.R
+        R[:size, size:] = coupling
+        R[size:, size:] = r_new
+        self.Q = np.hstack((self.Q, q_new))
+        self.R = R
+        return True
+
+    def solve(self, b):
+        """Least-squares coefficients for one or several stacked targets."""
+        from scipy.linalg import solve_triangular
+
+        return solve_triangular(self.R, self.Q.T @ b)
+
+
+class DegreeSweep:
+    """
+    Fit the polynomial model for degrees 1..k and rank the degrees.
+    Terms are added in graded order (all terms of total degree d after those of degree
+    d - 1), so the design matrix of degree d + 1 is the one of degree d plus d + 2 new
+    columns, each a previous column times x or y, and the QR factorization is extended
+    by those columns instead of being recomputed.
+    """
+
+    def __init__(self, gcp_points, icp_points=None, forward=True):
+        """
+        :param gcp_points: PointSet (or list of point dicts) of the control points
+        :param icp_points: Optional check points, needed for the "icp_rmse" criterion
+        :param forward: Sweep the forward (ground -> image) or the backward model
+        """
+        self.gcp_points = as_point_set(gcp_points)
+        self.icp_points = as_point_set(icp_points)
+        self.forward = forward
+
+    def run(self, max_degree=5, criterion="bic", progress_callback=None, cancel_flag=None):
+        """
+        Evaluate every degree from 1 to `max_degree` that the GCPs can support
+        (more GCPs than terms, and linearly independent terms).
+
+        :param criterion: Ranking key: "icp_rmse", "loo_rmse" (leave-one-out CV), "aic" or "bic"
+        :return: List of result dicts ranked best first, each with "degree", "terms",
+                 "gcp_rmse", "loo_rmse", "icp_rmse" ((2,) arrays, or None without ICPs),
+                 "aic", "bic", "coeffs" (in `design_matrix` term order, normalized units)
+                 and "score" (the ranking value).
+        """
+        if criterion not in CRITERIA:
+            raise ValueError(f"Unknown criterion '{criterion}'; expected one of {CRITERIA}.")
+        if criterion == "icp_rmse" and len(self.icp_points) == 0:
+            raise ValueError("The icp_rmse criterion needs ICP points.")
+
+        polynomial = Polynomial(self.gcp_points, 1)
+        x, y, X, Y = polynomial.normalize_data()
+        factors = polynomial.normalization_factors
+        u, v, targets = (X, Y, np.column_stack((x, y))) if self.forward else (x, y, np.column_stack((X, Y)))
+        out_keys = ("x", "y") if self.forward else ("X", "Y")
+        scale = np.array([factors[key + "_std"] for key in out_keys])
+
+        n = len(self.gcp_points)
+        qr = IncrementalQR(n)
+        qr.append(np.ones((n, 1)))
+        block = np.ones((n, 1))          # the terms of the last total degree, x^(d-j) y^j
+        graded = [(0, 0)]
+
+        results = []
+        for degree in range(1, max_degree + 1):
+            if cancel_flag and cancel_flag():
+                break
+            if num_terms(degree) >= n:
+                break
+
+            block = np.column_stack((block * u[:, None], block[:, -1] * v))
+            if not qr.append(block):
+                break
+            graded += [(degree - j, j) for j in range(degree + 1)]
+
+            results.append(self._evaluate(qr, targets, graded, degree, scale, factors))
+            if progress_callback:
+                progress_callback(100.0 * degree / max_degree)
+
+        for result in results:
+            result["score"] = self._score(result, criterion)
+        results.sort(key=lambda result: (np.isnan(result["score"]), result["score"]))
+        return results
+
+    def _evaluate(self, qr, targets, graded, degree, scale, factors):
+        n, terms = len(targets), len(graded)
+        graded_coeffs = qr.solve(targets)
+        coeffs = np.empty((2, terms))
+        for k, (i, j) in enumerate(graded):
+            coeffs[:, term_offset(i, j, degree)] = graded_coeffs[k]
+
+        residuals = (targets - qr.Q @ (qr.Q.T @ targets)) * scale
+        rss = np.sum(residuals ** 2, axis=0)
+        leverage = np.einsum("ij,ij->i", qr.Q, qr.Q)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loo = residuals / np.where(leverage < 1.0 - 1e-10, 1.0 - leverage, np.nan)[:, None]
+            log_likelihood = n * np.log(rss / n)
+
+        icp_rmse = None
+        if len(self.icp_points):
+            transform = CompiledTransform(coeffs, factors, degree, self.forward)
+            if self.forward:
+                predicted = transform(self.icp_points.X, self.icp_points.Y)
+                actual = (self.icp_points.x, self.icp_points.y)
+            else:
+                predicted = transform(self.icp_points.x, self.icp_points.y)
+                actual = (self.icp_points.X, self.icp_points.Y)
+            icp_rmse = np.array([np.sqrt(np.mean((p - a) ** 2)) for p, a in zip(predicted, actual)])
+
+        return {
+            "degree": degree,
+            "terms": terms,
+            "coeffs": coeffs,
+            "gcp_rmse": np.sqrt(rss / n),
+            "loo_rmse": np.sqrt(np.nanmean(loo ** 2, axis=0)) if np.isfinite(loo).any() else np.full(2, np.nan),
+            "icp_rmse": icp_rmse,
+            "aic": float(np.sum(log_likelihood + 2 * terms)),
+            "bic": float(np.sum(log_likelihood + terms * np.log(n))),
+        }
+
+    @staticmethod
+    def _score(result, criterion):
+        value = result[criterion]
+        if criterion in ("icp_rmse", "loo_rmse"):
+            return float(np.hypot(*value))
+        return float(value)
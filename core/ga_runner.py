@@ -1,7 +1,19 @@
 import numpy as np
-import thirdparty.GA.build.genetic_algorithm as ga
 from PySide6.QtWidgets import QDialog, QMessageBox, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout
 from core.project import Project
+from core.points import as_point_set
+
+def load_ga_extension():
+    """
+    Import the compiled GA extension on first use, so the toolbox starts without it.
+    Returns the module, or None if it has not been built (see thirdparty/GA/readme.md).
+    """
+    try:
+        import thirdparty.GA.build.genetic_algorithm as ga
+    except ImportError:
+        return None
+    return ga
+
 
 class GARunner:
     """
@@ -81,6 +93,12 @@ class GARunner:
         Runs four GA regressions using only GCP points from the main toolbox.
         Displays the best coefficients for each equation.
         """
+        ga = load_ga_extension()
+        if ga is None:
+            QMessageBox.warning(self.parent, "Warning",
+                                "The GA extension is not built. See thirdparty/GA/readme.md.")
+            return
+
         # Get GCP points from the parent (ToolBoxMainWindow)
         gcp_points = self.parent.get_gcp_points()
         if not gcp_points:
@@ -92,10 +110,8 @@ class GARunner:
 
         def normalize_data(gcp_points):
             """Normalize the GCP data and keep normalization factors."""
-            x = np.array([point['x'] for point in gcp_points])
-            y = np.array([point['y'] for point in gcp_points])
-            X = np.array([point['X'] for point in gcp_points])
-            Y = np.array([point['Y'] for point in gcp_points])
+            gcp_points = as_point_set(gcp_points)
+            x, y, X, Y = gcp_points.x, gcp_points.y, gcp_points.X, gcp_points.Y
 
             normalization_factors = {
                 "x_mean": x.mean(), "x_std": x.std(),
@@ -0,0 +1,209 @@
+import os
+import sys
+
+import numpy as np
+
+RAW_EXTENSIONS = (".raw", ".bil", ".bip", ".bsq", ".img")
+
+# ENVI "data type" codes for the sample types we can read.
+ENVI_DTYPES = {1: np.uint8, 2: np.int16, 4: np.float32, 5: np.float64, 12: np.uint16}
+
+
+class ImageSource:
+    """
+    Read-only access to the pixels of a source image, one window at a time.
+    Backends only have to provide `shape` and `read_window`, so the resampling engine
+    never needs the whole scene in memory.
+    """
+
+    # File-backed sources can be reopened by worker processes instead of being copied.
+    file_backed = False
+
+    @property
+    def height(self):
+        return self.shape[0]
+
+    @property
+    def width(self):
+        return self.shape[1]
+
+    def read_window(self, start_row, end_row, start_col, end_col):
+        """
+        Pixels [start_row:end_row, start_col:end_col] as a (rows, cols, bands) array.
+        """
+        raise NotImplementedError
+
+
+class ArraySource(ImageSource):
+    """
+    A source backed by an array-like (an in-memory array or a memory map).
+    Windows are returned as views, so reading them costs nothing until pixels are gathered.
+    """
+
+    def __init__(self, array):
+        array = np.asarray(array) if not isinstance(array, np.memmap) else array
+        if array.ndim == 2:
+            array = array[:, :, None]
+        self.array = array
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def read_window(self, start_row, end_row, start_col, end_col):
+        return self.array[start_row:end_row, start_col:end_col]
+
+
+class QImageSource(ArraySource):
+    """
+    A decoded QImage, wrapped as a zero-copy uint8 RGB view of its pixel buffer.
+    """
+
+    def __init__(self, image):
+        view, self.qimage = qimage_to_numpy(image)
+        super().__init__(view)
+
+
+class NpySource(ArraySource):
+    """
+    A `.npy` raster (rows, cols[, bands]) opened as a read-only memory map.
+    Only the windows that are actually read are paged in from disk.
+    """
+
+    file_backed = True
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__(np.load(path, mmap_mode="r"))
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+class RawSource(ArraySource):
+    """
+    A headerless raw raster opened as a memory map, in BIL, BIP or BSQ band interleave.
+    The layout is given explicitly or read from an ENVI `.hdr` file next to the raster.
+    """
+
+    file_backed = True
+
+    def __init__(self, path, height=None, width=None, bands=None, dtype=np.uint8,
+                 interleave="bil", offset=0, byte_order="little"):
+        if height is None or width is None:
+            header = read_envi_header(path)
+            height, width = header["lines"], header["samples"]
+            bands = header["bands"]
+            dtype, interleave = header["dtype"], header["interleave"]
+            offset, byte_order = header["offset"], header["byte_order"]
+
+        self.path = path
+        self.layout = dict(height=height, width=width, bands=bands or 1, dtype=dtype,
+                           interleave=interleave, offset=offset, byte_order=byte_order)
+
+        dtype = np.dtype(dtype).newbyteorder("<" if byte_order == "little" else ">")
+        bands = bands or 1
+        interleave = interleave.lower()
+        if interleave == "bil":
+            raw = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(height, bands, width))
+            array = raw.transpose(0, 2, 1)
+        elif interleave == "bip":
+            array = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(height, width, bands))
+        elif interleave == "bsq":
+            raw = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(bands, height, width))
+            array = raw.transpose(1, 2, 0)
+        else:
+            raise ValueError(f"Unknown band interleave: {interleave!r} (expected bil, bip or bsq).")
+        super().__init__(array)
+
+    def __getstate__(self):
+        return {"path": self.path, "layout": self.layout}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], **state["layout"])
+
+
+def read_envi_header(path):
+    """
+    Parse the fields of an ENVI header (`<raster>.hdr` or `<stem>.hdr`) needed to map a raw raster.
+    """
+    candidates = [path + ".hdr", os.path.splitext(path)[0] + ".hdr"]
+    header_path = next((p for p in candidates if os.path.exists(p)), None)
+    if header_path is None:
+        raise ValueError(f"No ENVI header found for raw raster {path}.")
+
+    fields = {}
+    with open(header_path, "r") as file:
+        for line in file:
+            if "=" in line:
+                key, value = line.split("=", 1)
+                fields[key.strip().lower()] = value.strip()
+
+    data_type = int(fields.get("data type", 1))
+    if data_type not in ENVI_DTYPES:
+        raise ValueError(f"Unsupported ENVI data type {data_type} in {header_path}.")
+
+    return {
+        "samples": int(fields["samples"]),
+        "lines": int(fields["lines"]),
+        "bands": int(fields.get("bands", 1)),
+        "dtype": ENVI_DTYPES[data_type],
+        "interleave": fields.get("interleave", "bil"),
+        "offset": int(fields.get("header offset", 0)),
+        "byte_order": "big" if fields.get("byte order", "0") == "1" else "little",
+    }
+
+
+def qimage_to_numpy(image):
+    """
+    Wrap a QImage as a zero-copy uint8 NumPy view (height, width, 3) in RGB order.
+    Returns (view, qimage): the view points into the pixel buffer of the returned
+    QImage, so the caller must keep that QImage alive as long as the view is used.
+    """
+    from PySide6.QtGui import QImage
+
+    if image is None or image.isNull():
+        raise ValueError("Invalid QImage provided.")
+
+    # A no-op (shared) conversion for the usual decoded formats.
+    image = image.convertToFormat(QImage.Format.Format_RGB32)
+
+    width, height = image.width(), image.height()
+
+    ptr = image.constBits()
+    arr = np.ndarray(
+        shape=(height, width, 4), dtype=np.uint8, buffer=ptr,
+        strides=(image.bytesPerLine(), 4, 1)
+    )
+    # RGB32 pixels are 0xffRRGGBB words, so the byte order depends on the platform.
+    rgb = arr[..., 2::-1] if sys.byteorder == "little" else arr[..., 1:]
+    return rgb, image
+
+
+def open_image_source(image):
+    """
+    Turn whatever the caller has into an ImageSource:
+    an ImageSource, a NumPy array, a QImage, or a path (`.npy`, raw/ENVI, or any
+    format QImage can decode).
+    """
+    if isinstance(image, ImageSource):
+        return image
+    if isinstance(image, np.ndarray):
+        return ArraySource(image)
+    if isinstance(image, (str, os.PathLike)):
+        path = os.fspath(image)
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npy":
+            return NpySource(path)
+        if extension in RAW_EXTENSIONS:
+            return RawSource(path)
+
+        from PySide6.QtGui import QImage
+        decoded = QImage(path)
+        if decoded.isNull():
+            raise ValueError(f"Could not read image from {path}.")
+        return QImageSource(decoded)
+    return QImageSource(image)
@@ -0,0 +1,131 @@
+import numpy as np
+
+
+def gather(image, rows, cols):
+    """
+    Fetch image[rows, cols] for integer index arrays. Contiguous images are read through
+    a flat `np.take`, which is markedly faster than two-axis fancy indexing.
+    """
+    if image.flags.c_contiguous:
+        flat = image.reshape((-1,) + image.shape[2:])
+        return np.take(flat, rows * image.shape[1] + cols, axis=0)
+    return image[rows, cols]
+
+
+def nearest(image, x, y):
+    """
+    Nearest-neighbour interpolation: a single gather, no blending.
+    Suited to fast previews and classified rasters.
+    """
+    height, width = image.shape[:2]
+    ix = np.clip(np.rint(x).astype(np.intp), 0, width - 1)
+    iy = np.clip(np.rint(y).astype(np.intp), 0, height - 1)
+    return gather(image, iy, ix).astype(np.float32)
+
+
+def bilinear(image, x, y):
+    """
+    Bilinear interpolation from the 2 x 2 neighbourhood of each point.
+    """
+    height, width = image.shape[:2]
+    x0 = np.floor(x).astype(np.intp)
+    y0 = np.floor(y).astype(np.intp)
+    dx = (x - x0).astype(np.float32)[:, None]
+    dy = (y - y0).astype(np.float32)[:, None]
+    x1 = np.minimum(x0 + 1, width - 1)
+    y1 = np.minimum(y0 + 1, height - 1)
+
+    top_left     = gather(image, y0, x0).astype(np.float32)
+    top_right    = gather(image, y0, x1).astype(np.float32)
+    bottom_left  = gather(image, y1, x0).astype(np.float32)
+    bottom_right = gather(image, y1, x1).astype(np.float32)
+
+    top    = top_left + dx * (top_right - top_left)
+    bottom = bottom_left + dx * (bottom_right - bottom_left)
+    return top + dy * (bottom - top)
+
+
+def _cubic_weights(t, a=-0.5):
+    """
+    Keys cubic convolution weights for distances `t` (a = -0.5 gives Catmull-Rom).
+    """
+    t = np.abs(t)
+    t2, t3 = t * t, t * t * t
+    near = (a + 2.0) * t3 - (a + 3.0) * t2 + 1.0
+    far = a * t3 - 5.0 * a * t2 + 8.0 * a * t - 4.0 * a
+    return np.where(t <= 1.0, near, np.where(t < 2.0, far, 0.0)).astype(t.dtype)
+
+
+def _lanczos_weights(t, lobes=3):
+    """
+    Lanczos window sinc(t) * sinc(t / lobes) for distances `t`.
+    """
+    return np.where(np.abs(t) < lobes, np.sinc(t) * np.sinc(t / lobes), 0.0).astype(t.dtype)
+
+
+def _separable(image, x, y, radius, weight_fn):
+    """
+    Generic separable kernel over the (2 * radius) x (2 * radius) neighbourhood.
+    Indices are clamped at the image border and weights are normalized to sum to one.
+    """
+    height, width = image.shape[:2]
+    x0 = np.floor(x).astype(np.intp)
+    y0 = np.floor(y).astype(np.intp)
+    offsets = np.arange(1 - radius, radius + 1)
+
+    # Taps along the first axis so each tap's weights and indices are contiguous.
+    wx = weight_fn((x - x0).astype(np.float32)[None, :] - offsets[:, None].astype(np.float32))
+    wy = weight_fn((y - y0).astype(np.float32)[None, :] - offsets[:, None].astype(np.float32))
+    wx /= wx.sum(axis=0)
+    wy /= wy.sum(axis=0)
+
+    cols = np.clip(x0[None, :] + offsets[:, None], 0, width - 1)
+    rows = np.clip(y0[None, :] + offsets[:, None], 0, height - 1)
+
+    result = np.zeros((len(x),) + image.shape[2:], dtype=np.float32)
+    row_sum = np.empty_like(result)
+    sample = np.empty_like(result)
+    for m in range(len(offsets)):
+        row_sum.fill(0.0)
+        for n in range(len(offsets)):
+            np.multiply(wx[n, :, None], gather(image, rows[m], cols[n]), out=sample)
+            row_sum += sample
+        np.multiply(wy[m, :, None], row_sum, out=row_sum)
+        result += row_sum
+    return result
+
+
+def bicubic(image, x, y):
+    """
+    Bicubic (Keys / Catmull-Rom) interpolation from the 4 x 4 neighbourhood.
+    """
+    return _separable(image, x, y, 2, _cubic_weights)
+
+
+def lanczos(image, x, y):
+    """
+    Lanczos-3 interpolation from the 6 x 6 neighbourhood; sharpest of the kernels.
+    """
+    return _separable(image, x, y, 3, _lanczos_weights)
+
+
+# Kernel name -> (function, support radius in source pixels).
+INTERPOLATION_KERNELS = {
+    "nearest": (nearest, 1),
+    "bilinear": (bilinear, 1),
+    "bicubic": (bicubic, 2),
+    "lanczos": (lanczos, 3),
+}
+
+
+def get_kernel(name):
+    """
+    Look up an interpolation kernel function by name.
+    """
+    try:
+        return INTERPOLATION_KERNELS[name][0]
+    except KeyError:
+        raise ValueError(
+            f"Unknown interpolation kernel: {name!r} "
+            f"(expected one of {', '.join(INTERPOLATION_KERNELS)})."
+        ) from None
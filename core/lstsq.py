@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class LeastSquares:
+    """
+    A design matrix factored once (thin SVD) and reused for every target.
+    Solutions match np.linalg.lstsq(A, b, rcond=None): singular values below
+    eps * max(M, N) * s_max are dropped and the minimum-norm solution is returned.
+    Leverage and coefficient covariances come from the same factors without refitting.
+    """
+
+    def __init__(self, A, rcond=None):
+        """
+        :param A: (M, T) design matrix
+        :param rcond: Relative singular-value cut-off; defaults to eps * max(M, T)
+        """
+        A = np.asarray(A, dtype=np.float64)
+        self.shape = A.shape
+        U, s, Vt = np.linalg.svd(A, full_matrices=False)
+        if rcond is None:
+            rcond = np.finfo(np.float64).eps * max(A.shape)
+        self.singular_values = s
+        self.rank = int(np.count_nonzero(s > rcond * s[0])) if s.size else 0
+        self.U = U[:, :self.rank]
+        self.s = s[:self.rank]
+        self.Vt = Vt[:self.rank]
+        self._leverage = None
+
+    @property
+    def dof(self):
+        """Residual degrees of freedom, M - rank."""
+        return self.shape[0] - self.rank
+
+    def solve(self, b):
+        """
+        Least-squares coefficients for one target (M,) or several stacked targets (M, K).
+        """
+        b = np.asarray(b, dtype=np.float64)
+        projected = self.U.T @ b
+        projected /= self.s.reshape((-1,) + (1,) * (b.ndim - 1))
+        return self.Vt.T @ projected
+
+    def fitted(self, b):
+        """Fitted values A @ solve(b), computed as the projection U U^T b."""
+        return self.U @ (self.U.T @ np.asarray(b, dtype=np.float64))
+
+    def residuals(self, b):
+        """Residuals b - A @ solve(b)."""
+        b = np.asarray(b, dtype=np.float64)
+        return b - self.fitted(b)
+
+    def residual_variance(self, b):
+        """
+        Unbiased residual variance RSS / (M - rank), per target column.
+        """
+        rss = np.sum(self.residuals(b) ** 2, axis=0)
+        return rss / self.dof if self.dof > 0 else np.full(np.shape(rss), np.nan)
+
+    def leverage(self):
+        """
+        Diagonal of the hat matrix H = A A^+ (the leverage of every observation).
+        """
+        if self._leverage is None:
+            self._leverage = np.einsum("ij,ij->i", self.U, self.U)
+        return self._leverage
+
+    def covariance(self, variance=1.0):
+        """
+        Coefficient covariance variance * (A^T A)^+.
+        With an array of K variances (one per target) the result is (K, T, T).
+        """
+        unscaled = (self.Vt.T / self.s ** 2) @ self.Vt
+        variance = np.asarray(variance, dtype=np.float64)
+        if variance.ndim == 0:
+            return unscaled * variance
+        return variance[:, None, None] * unscaled
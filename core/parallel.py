@@ -0,0 +1,159 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_worker = None
+_worker_outputs = {}
+
+
+class SharedArray:
+    """
+    A NumPy array living in a named shared-memory block, so worker processes can
+    attach to it without copying. The creating process owns (and unlinks) the block.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype):
+        nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return cls(shm, shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, array):
+        shared = cls.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, shape, dtype = descriptor
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching always registers with the resource tracker,
+            # which pool workers share with the owning process.
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, dtype, owner=False)
+
+    @property
+    def descriptor(self):
+        return self.shm.name, self.shape, self.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def default_workers():
+    """
+    Number of workers used when a pool size is not given explicitly.
+    """
+    return os.cpu_count() or 1
+
+
+def make_executor(kind, workers, initializer=None, initargs=()):
+    """
+    Build a thread or process pool of `workers` workers.
+    The initializer is only used for process pools.
+    """
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    raise ValueError(f"Unknown executor kind: {kind!r} (expected 'thread' or 'process').")
+
+
+def run_pooled(executor, workers, submit, jobs, on_done, cancel_flag=None, max_in_flight=None):
+    """
+    Feed `jobs` to `executor` (a pool of `workers` workers) through
+    `submit(executor, job) -> Future`, keeping at most `max_in_flight` jobs queued
+    (2 per worker by default) so a cancel takes effect quickly. `on_done` is called in
+    the calling thread with each result, which keeps progress reporting on that thread.
+    Returns False if the run was cancelled.
+    """
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    jobs = iter(jobs)
+    pending = set()
+    cancelled = False
+
+    while True:
+        while not cancelled and len(pending) < max_in_flight:
+            job = next(jobs, None)
+            if job is None:
+                break
+            pending.add(submit(executor, job))
+
+        if not pending:
+            break
+
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            if not future.cancelled():
+                on_done(future.result())
+
+        if not cancelled and cancel_flag and cancel_flag():
+            cancelled = True
+            for future in pending:
+                future.cancel()
+
+    return not cancelled
+
+
+def init_tile_worker(state, image_descriptor):
+    """
+    Process-pool initializer: rebuild a `Resampling` from its state. In-memory sources
+    arrive as a shared-memory descriptor; file-backed sources are part of `state`.
+    """
+    global _worker
+    from core.image_source import ArraySource
+    from core.resampling import Resampling
+
+    _worker = Resampling.__new__(Resampling)
+    _worker.__dict__.update(state)
+    if image_descriptor is not None:
+        image = SharedArray.attach(image_descriptor)
+        _worker.source = ArraySource(image.array)
+        _worker._shared_image = image
+
+
+def _worker_output(descriptor):
+    if descriptor not in _worker_outputs:
+        kind, target = descriptor[0], descriptor[1:]
+        if kind == "shm":
+            # Keep the SharedArray itself alive: dropping it would unmap the buffer.
+            _worker_outputs[descriptor] = SharedArray.attach(target)
+        else:
+            _worker_outputs[descriptor] = np.lib.format.open_memmap(target[0], mode="r+")
+    output = _worker_outputs[descriptor]
+    return output.array if isinstance(output, SharedArray) else output
+
+
+def resample_tile_job(job, x_vals, y_vals, output_descriptor):
+    """
+    Process-pool task: resample one tile and write it straight into the shared output.
+    """
+    tile_idx, start_row, end_row, start_col, end_col = job
+    out = _worker_output(output_descriptor)
+    out[start_row:end_row, start_col:end_col] = _worker.resample_tile(
+        x_vals, y_vals, start_row, start_col
+    )
+    return tile_idx
@@ -1,5 +1,3 @@
-import numpy as np
-
 from PySide6.QtWidgets import (
     QDialog, QGraphicsScene, QGraphicsPixmapItem,
     QVBoxLayout, QLabel, QScrollArea, QMessageBox
@@ -8,6 +6,7 @@ from PySide6.QtCore import Qt, QPointF
 from PySide6.QtGui import QPixmap, QPen, QImage, QPainter
 
 from core.polynomial import Polynomial
+from core.points import as_point_set
 
 class GraphicsSceneMouseLabel(QLabel):
     """
@@ -61,8 +60,8 @@ class SplitLineWindow(QDialog):
     def __init__(self, qpixmap, gcp_points, icp_points, scene, degree=1, parent=None):
         """
         :param qpixmap:    QPixmap of the image to display.
-        :param gcp_points: List of GCP dicts, e.g. [{"x": .., "y": .., "X": .., "Y": .., "Z": ..}, ...].
-        :param icp_points: List of ICP dicts, e.g. [{"x": .., "y": .., "X": .., "Y": ..}, ...].
+        :param gcp_points: PointSet of GCPs (or a list of {"x", "y", "X", "Y", "Z"} dicts).
+        :param icp_points: PointSet of ICPs (or a list of {"x", "y", "X", "Y"} dicts).
         :param degree:     Polynomial degree to use for regression.
         :param parent:     Optional parent QWidget.
         """
@@ -139,30 +138,19 @@ class SplitLineWindow(QDialog):
         # Unpack the line endpoints
         (x1, y1), (x2, y2) = self.line_points
 
-        # Separate GCPs into side A or side B of the line
-        gcp_side_a = []
-        gcp_side_b = []
-
-        for gcp in self.gcp_points:
-            sign = self._side_of_line(gcp["x"], gcp["y"], x1, y1, x2, y2)
-            if sign >= 0:
-                gcp_side_a.append(gcp)
-            else:
-                gcp_side_b.append(gcp)
-
-        # Separate ICPs into side A or side B
-        icp_side_a = []
-        icp_side_b = []
-        for icp in self.icp_points:
-            sign = self._side_of_line(icp["x"], icp["y"], x1, y1, x2, y2)
-            if sign >= 0:
-                icp_side_a.append(icp)
-            else:
-                icp_side_b.append(icp)
+        # Separate GCPs and ICPs into side A or side B of the line
+        gcp_points = as_point_set(self.gcp_points)
+        icp_points = as_point_set(self.icp_points)
+
+        gcp_on_a = self._side_of_line(gcp_points.x, gcp_points.y, x1, y1, x2, y2) >= 0
+        icp_on_a = self._side_of_line(icp_points.x, icp_points.y, x1, y1, x2, y2) >= 0
+
+        gcp_side_a, gcp_side_b = gcp_points[gcp_on_a], gcp_points[~gcp_on_a]
+        icp_side_a, icp_side_b = icp_points[icp_on_a], icp_points[~icp_on_a]
 
         # Perform regression on side A
         rmse_forward_a, rmse_backward_a = None, None
-        if gcp_side_a and icp_side_a:
+        if len(gcp_side_a) and len(icp_side_a):
             poly_a = Polynomial(gcp_side_a, self.degree)
             # Regress polynomials
             fxA, fyA, bxA, byA = poly_a.regress_polynomial()
@@ -173,12 +161,10 @@ class SplitLineWindow(QDialog):
             px_bwd, py_bwd = poly_a.evaluate((bxA, byA), icp_side_a, forward=False)
 
             # Compute RMSE
-            actual_x = np.array([p["x"] for p in icp_side_a])
-            actual_y = np.array([p["y"] for p in icp_side_a])
+            actual_x, actual_y = icp_side_a.x, icp_side_a.y
             rmseX_fwd, rmseY_fwd = poly_a.rmse(px_fwd, py_fwd, actual_x, actual_y)
 
-            actual_X = np.array([p["X"] for p in icp_side_a])
-            actual_Y = np.array([p["Y"] for p in icp_side_a])
+            actual_X, actual_Y = icp_side_a.X, icp_side_a.Y
             rmseX_bwd, rmseY_bwd = poly_a.rmse(px_bwd, py_bwd, actual_X, actual_Y)
 
             rmse_forward_a = (rmseX_fwd, rmseY_fwd)
@@ -186,7 +172,7 @@ class SplitLineWindow(QDialog):
 
         # Perform regression on side B
         rmse_forward_b, rmse_backward_b = None, None
-        if gcp_side_b and icp_side_b:
+        if len(gcp_side_b) and len(icp_side_b):
             poly_b = Polynomial(gcp_side_b, self.degree)
             fxB, fyB, bxB, byB = poly_b.regress_polynomial()
 
@@ -196,12 +182,10 @@ class SplitLineWindow(QDialog):
             px_bwd, py_bwd = poly_b.evaluate((bxB, byB), icp_side_b, forward=False)
 
             # Compute RMSE
-            actual_x = np.array([p["x"] for p in icp_side_b])
-            actual_y = np.array([p["y"] for p in icp_side_b])
+            actual_x, actual_y = icp_side_b.x, icp_side_b.y
             rmseX_fwd, rmseY_fwd = poly_b.rmse(px_fwd, py_fwd, actual_x, actual_y)
 
-            actual_X = np.array([p["X"] for p in icp_side_b])
-            actual_Y = np.array([p["Y"] for p in icp_side_b])
+            actual_X, actual_Y = icp_side_b.X, icp_side_b.Y
             rmseX_bwd, rmseY_bwd = poly_b.rmse(px_bwd, py_bwd, actual_X, actual_Y)
 
             rmse_forward_b = (rmseX_fwd, rmseY_fwd)
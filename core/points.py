@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class PointSet:
+    """
+    Columnar store of tie points.
+    Coordinates live in one float64 (N, 5) array with columns x, y, X, Y, Z, so the
+    image (x, y) and ground (X, Y) coordinates are zero-copy (N, 2) views. Each point
+    also has an integer id and an `icp` flag (True = check point, False = control point).
+    """
+
+    COLUMNS = ("x", "y", "X", "Y", "Z")
+
+    def __init__(self, data=None, ids=None, icp=None):
+        """
+        :param data: (N, 5) array-like of x, y, X, Y, Z (a missing Z is NaN)
+        :param ids: Optional (N,) point ids; defaults to 1..N
+        :param icp: Optional (N,) boolean ICP flags; defaults to all GCP
+        """
+        if data is None:
+            data = np.empty((0, 5))
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 5)
+        n = len(self.data)
+        self.ids = np.arange(1, n + 1) if ids is None else np.asarray(ids).reshape(n)
+        self.icp = np.zeros(n, dtype=bool) if icp is None else np.asarray(icp, dtype=bool).reshape(n)
+
+    @classmethod
+    def from_dicts(cls, points, icp=None):
+        """
+        Build a PointSet from the legacy list of {'x', 'y', 'X', 'Y'[, 'Z']} dicts.
+        """
+        data = np.array([[p["x"], p["y"], p["X"], p["Y"], p.get("Z", np.nan)] for p in points],
+                        dtype=np.float64).reshape(-1, 5)
+        return cls(data, icp=icp)
+
+    @classmethod
+    def from_arrays(cls, x, y, X, Y, Z=None, ids=None, icp=None):
+        """
+        Build a PointSet from separate coordinate columns.
+        """
+        data = np.empty((len(x), 5))
+        data[:, 0], data[:, 1], data[:, 2], data[:, 3] = x, y, X, Y
+        data[:, 4] = np.nan if Z is None else Z
+        return cls(data, ids=ids, icp=icp)
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @property
+    def X(self):
+        return self.data[:, 2]
+
+    @property
+    def Y(self):
+        return self.data[:, 3]
+
+    @property
+    def Z(self):
+        return self.data[:, 4]
+
+    @property
+    def image_xy(self):
+        """(N, 2) view of the image coordinates."""
+        return self.data[:, 0:2]
+
+    @property
+    def ground_XY(self):
+        """(N, 2) view of the ground coordinates."""
+        return self.data[:, 2:4]
+
+    def gcps(self):
+        """The control points (ICP flag unset)."""
+        return self[~self.icp]
+
+    def icps(self):
+        """The check points (ICP flag set)."""
+        return self[self.icp]
+
+    def column(self, key):
+        """A coordinate column by its legacy dict key ('x', 'y', 'X', 'Y' or 'Z')."""
+        return self.data[:, self.COLUMNS.index(key)]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        """
+        Integer index -> point dict; slice, mask or index array -> PointSet subset.
+        """
+        if isinstance(index, (int, np.integer)):
+            return dict(zip(self.COLUMNS, self.data[index].tolist()))
+        return PointSet(self.data[index], self.ids[index], self.icp[index])
+
+    def __iter__(self):
+        """Iterate as legacy point dicts, for code that has not moved to columns yet."""
+        for row in self.data.tolist():
+            yield dict(zip(self.COLUMNS, row))
+
+    def to_dicts(self):
+        return list(self)
+
+
+def as_point_set(points):
+    """
+    Accept a PointSet, a list of point dicts, or None, and return a PointSet.
+    """
+    if isinstance(points, PointSet):
+        return points
+    if points is None:
+        return PointSet()
+    return PointSet.from_dicts(points)
+
+
+def load_point_file(path, icp=True):
+    """
+    Bulk-load a whitespace-separated point file (one `id x y X Y [Z]` row per point,
+    the SPOT.txt layout) into a PointSet with a single vectorized parse.
+
+    :param path: Path to the point file
+    :param icp: Initial ICP flag for every point (the toolbox marks all points as ICP)
+    :return: PointSet
+    """
+    raw = np.loadtxt(path, dtype=np.float64, ndmin=2)
+    if raw.shape[1] < 5:
+        raise ValueError(f"{path}: expected at least 5 columns (id x y X Y [Z]), got {raw.shape[1]}")
+    data = np.full((len(raw), 5), np.nan)
+    data[:, :min(raw.shape[1] - 1, 5)] = raw[:, 1:6]
+    return PointSet(data, ids=raw[:, 0].astype(np.int64), icp=np.full(len(raw), icp, dtype=bool))
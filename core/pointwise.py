@@ -1,26 +1,156 @@
+import hashlib
+import warnings
+from collections import OrderedDict
+
 import numpy as np
 
+from core.points import as_point_set
+from core.spatial import QuadrantIndex, distance_matrix, iter_distance_blocks
+
+# Factorizations of RBF kernel matrices, keyed on the GCP coordinates they were built from.
+FACTOR_CACHE_SIZE = 8
+_factor_cache = OrderedDict()
+
+# Neighbours expected inside the CSRBF support radius of a typical GCP.
+CSRBF_NEIGHBOURS = 64
+
+
+def gcp_key(coords):
+    """
+    Content hash of a GCP coordinate array, used to key cached factorizations.
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    return hashlib.sha1(coords.tobytes()).hexdigest() + str(coords.shape)
+
+
+def cached_factor(key, factorize):
+    """
+    Return the cached factorization for `key`, calling `factorize()` on a miss.
+    The most recently used FACTOR_CACHE_SIZE factorizations are kept, so a new ICP set
+    or new residuals over the same GCPs only cost triangular solves.
+    """
+    if key in _factor_cache:
+        _factor_cache.move_to_end(key)
+        return _factor_cache[key]
+
+    factor = factorize()
+    _factor_cache[key] = factor
+    while len(_factor_cache) > FACTOR_CACHE_SIZE:
+        _factor_cache.popitem(last=False)
+    return factor
+
+
+def mq_factor(gcp_coords, distance_matrix):
+    """
+    LU factorization of the MQ kernel matrix over `gcp_coords`, computed once per GCP set.
+    :param gcp_coords: GCP coordinates (N x 2 array)
+    :param distance_matrix: Callable building the (N x N) kernel matrix from gcp_coords
+    :return: (lu, piv) as returned by scipy.linalg.lu_factor
+    :raises numpy.linalg.LinAlgError: If the kernel matrix is singular (e.g. duplicate GCPs)
+    """
+    from scipy.linalg import LinAlgWarning, lu_factor
+
+    def factorize():
+        # lu_factor only warns on an exactly singular matrix; fail as np.linalg.solve did
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LinAlgWarning)
+            lu, piv = lu_factor(distance_matrix(gcp_coords, gcp_coords))
+        if not np.all(np.isfinite(np.diag(lu))) or np.any(np.diag(lu) == 0):
+            raise np.linalg.LinAlgError("Singular matrix")
+        return lu, piv
+
+    return cached_factor(("mq", gcp_key(gcp_coords)), factorize)
+
+
+def wendland(distances, support):
+    """
+    Wendland's compactly supported C2 kernel (1 - t)^4 (4t + 1), t = d / support.
+    It is positive definite in 2D and exactly zero beyond `support`.
+    """
+    t = np.minimum(np.asarray(distances, dtype=np.float64) / support, 1.0)
+    return (1.0 - t) ** 4 * (4.0 * t + 1.0)
+
+
+def csrbf_support(index, neighbours=CSRBF_NEIGHBOURS):
+    """
+    Support radius giving each GCP about `neighbours` others inside it: the median distance
+    to the neighbours-th nearest GCP.
+    :param index: QuadrantIndex over the GCP coordinates
+    """
+    if len(index) < 2:
+        return 1.0
+    dist, _ = index.nearest(index.points, neighbours + 1)
+    support = float(np.median(dist[:, -1]))
+    return support if support > 0 else 1.0
+
+
+def csrbf_factor(index, support):
+    """
+    Sparse LU factorization of the CSRBF kernel matrix over the GCPs of `index`.
+    The matrix only holds the ~N x CSRBF_NEIGHBOURS pairs within `support`.
+    :return: scipy.sparse.linalg.SuperLU
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.linalg import splu
+
+    def factorize():
+        pairs = index.tree.sparse_distance_matrix(index.tree, support, output_type="coo_matrix")
+        n = len(index)
+        kernel = coo_matrix((wendland(pairs.data, support), (pairs.row, pairs.col)), shape=(n, n))
+        return splu(kernel.tocsc())
+
+    return cached_factor(("csrbf", gcp_key(index.points), support), factorize)
+
+
 class Pointwise:
     def __init__(self, gcps, icps, dx, dy, dX, dY):
         """
         Initialize the Pointwise class.
-        :param gcps: List of GCP points [{'x': ..., 'y': ..., 'X': ..., 'Y': ..., 'Z': ...}, ...]
-        :param icps: List of ICP points [{'x': ..., 'y': ..., 'X': ..., 'Y': ...}, ...]
+        :param gcps: PointSet of GCPs (or a list of {'x', 'y', 'X', 'Y', 'Z'} dicts)
+        :param icps: PointSet of ICPs (or a list of {'x', 'y', 'X', 'Y'} dicts)
         :param dx: List of dx values corresponding to GCPs
         :param dy: List of dy values corresponding to GCPs
         :param dX: List of dX values corresponding to GCPs
         :param dY: List of dY values corresponding to GCPs
         """
-        self.gcps = gcps
-        self.icps = icps
+        self.gcps = as_point_set(gcps)
+        self.icps = as_point_set(icps)
         self.dx = np.array(dx)
         self.dy = np.array(dy)
         self.dX = np.array(dX)
         self.dY = np.array(dY)
-        self.gcp_coords_xy = np.array([[p['x'], p['y']] for p in gcps])
-        self.gcp_coords_XY = np.array([[p['X'], p['Y']] for p in gcps])
-        self.icp_coords_xy = np.array([[p['x'], p['y']] for p in icps])
-        self.icp_coords_XY = np.array([[p['X'], p['Y']] for p in icps])
+        self.gcp_coords_xy = self.gcps.image_xy
+        self.gcp_coords_XY = self.gcps.ground_XY
+        self.icp_coords_xy = self.icps.image_xy
+        self.icp_coords_XY = self.icps.ground_XY
+        self._indices = {}
+        self._mq_coeffs = {}
+        self._csrbf = {}
+
+    def gcp_coords(self, space):
+        """
+        GCP coordinates in "image" (x, y) or "ground" (X, Y) space.
+        """
+        if space == "image":
+            return self.gcp_coords_xy
+        if space == "ground":
+            return self.gcp_coords_XY
+        raise ValueError(f"Unknown space '{space}'; expected 'image' or 'ground'.")
+
+    def spatial_index(self, space="image"):
+        """
+        Spatial index over the GCPs in `space`, built on first use and reused by every LDW query.
+        """
+        if space not in self._indices:
+            self._indices[space] = QuadrantIndex(self.gcp_coords(space))
+        return self._indices[space]
+
+    @property
+    def gcp_index(self):
+        """
+        Spatial index over gcp_coords_xy.
+        """
+        return self.spatial_index("image")
     
     def compute_distance_matrix(self, src, dest):
         """
@@ -29,62 +159,196 @@ class Pointwise:
         :param dest: Destination points (M x 2 array)
         :return: Distance matrix (N x M)
         """
-        dist_matrix = np.linalg.norm(src[:, None, :] - dest[None, :, :], axis=2)
-        return dist_matrix
+        return distance_matrix(src, dest)
+
+    def mq_coefficients(self, space="image"):
+        """
+        MQ coefficients of all four displacements over the GCPs in `space` (N x 4 array).
+        The kernel matrix is factored once per GCP set (see mq_factor) and all right-hand
+        sides are solved together.
+        """
+        if space not in self._mq_coeffs:
+            from scipy.linalg import lu_solve
+
+            values = np.column_stack([self.dx, self.dy, self.dX, self.dY])
+            factor = mq_factor(self.gcp_coords(space), self.compute_distance_matrix)
+            self._mq_coeffs[space] = lu_solve(factor, values)
+        return self._mq_coeffs[space]
 
     def multiquadratic(self):
         """
         Perform the multiquadratic interpolation to estimate dx, dy, dX, dY for ICPs.
+        dx, dy are interpolated over the image coordinates, dX, dY over the ground coordinates.
+        """
+        icp_dx, icp_dy = self.mq_interpolate(self.icp_coords_xy, "image")[:, :2].T
+        icp_dX, icp_dY = self.mq_interpolate(self.icp_coords_XY, "ground")[:, 2:].T
+
+        return icp_dx, icp_dy, icp_dX, icp_dY
+
+    def mq_interpolate(self, queries, space="image", chunk_size=None):
+        """
+        Multiquadratic interpolation of all four GCP displacements at arbitrary points,
+        with distances measured in `space`.
+        :param queries: Query points in `space` (M x 2 array)
+        :param space: "image" or "ground"
+        :param chunk_size: Queries per distance block (default: about 1 MB blocks)
+        :return: (M x 4) array of interpolated dx, dy, dX, dY
+        """
+        coeffs = self.mq_coefficients(space)
+
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        result = np.empty((len(queries), 4))
+        for start, block in iter_distance_blocks(queries, self.gcp_coords(space), block_rows=chunk_size):
+            np.matmul(block, coeffs, out=result[start:start + len(block)])
+        return result
+
+    def csrbf_coefficients(self, space="image"):
         """
-        dist_matrix_xy = self.compute_distance_matrix(self.gcp_coords_xy, self.gcp_coords_xy)
-        dist_matrix_XY = self.compute_distance_matrix(self.gcp_coords_XY, self.gcp_coords_XY)
-
-        coeffs_dx = np.linalg.solve(dist_matrix_xy, self.dx)
-        coeffs_dy = np.linalg.solve(dist_matrix_xy, self.dy)
-        coeffs_dX = np.linalg.solve(dist_matrix_XY, self.dX)
-        coeffs_dY = np.linalg.solve(dist_matrix_XY, self.dY)
-        
-        icp_dist_matrix_xy = self.compute_distance_matrix(self.icp_coords_xy, self.gcp_coords_xy)
-        icp_dist_matrix_XY = self.compute_distance_matrix(self.icp_coords_XY, self.gcp_coords_XY)
-
-        icp_dx = icp_dist_matrix_xy @ coeffs_dx
-        icp_dy = icp_dist_matrix_xy @ coeffs_dy
-        icp_dX = icp_dist_matrix_XY @ coeffs_dX
-        icp_dY = icp_dist_matrix_XY @ coeffs_dY
-        
+        Support radius and coefficients (N x 4) of the compactly supported RBF over the
+        GCPs in `space`. The sparse kernel matrix is factored once per GCP set.
+        """
+        if space not in self._csrbf:
+            index = self.spatial_index(space)
+            support = csrbf_support(index)
+            values = np.column_stack([self.dx, self.dy, self.dX, self.dY])
+            self._csrbf[space] = (support, csrbf_factor(index, support).solve(values))
+        return self._csrbf[space]
+
+    def csrbf_interpolate(self, queries, space="image", chunk_size=65536):
+        """
+        Compactly supported RBF (Wendland C2) interpolation of all four GCP displacements.
+        Only GCPs within the support radius of a query contribute, so memory and time grow
+        about linearly with the number of GCPs and queries, unlike the dense MQ path.
+        Far from every GCP (beyond the support radius) the interpolated displacement is 0.
+        :param queries: Query points in `space` (M x 2 array)
+        :param space: "image" or "ground"
+        :param chunk_size: Queries per chunk
+        :return: (M x 4) array of interpolated dx, dy, dX, dY
+        """
+        from scipy.sparse import csr_matrix
+        from scipy.spatial import cKDTree
+
+        support, coeffs = self.csrbf_coefficients(space)
+        tree = self.spatial_index(space).tree
+
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        result = np.empty((len(queries), 4))
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            pairs = tree.sparse_distance_matrix(cKDTree(chunk), support, output_type="coo_matrix")
+            kernel = csr_matrix((wendland(pairs.data, support), (pairs.col, pairs.row)),
+                                shape=(len(chunk), len(tree.data)))
+            result[start:start + chunk_size] = kernel @ coeffs
+        return result
+
+    def csrbf(self):
+        """
+        Compactly supported RBF counterpart of multiquadratic: dx, dy for ICPs interpolated
+        over the image coordinates, dX, dY over the ground coordinates.
+        """
+        icp_dx, icp_dy = self.csrbf_interpolate(self.icp_coords_xy, "image")[:, :2].T
+        icp_dX, icp_dY = self.csrbf_interpolate(self.icp_coords_XY, "ground")[:, 2:].T
         return icp_dx, icp_dy, icp_dX, icp_dY
 
+    def interpolate(self, queries, method="MQ", space="image", n=4, r=2, chunk_size=None):
+        """
+        Interpolate the GCP displacements dx, dy, dX, dY at arbitrary points.
+        :param queries: Query points in `space` (M x 2 array)
+        :param method: "MQ" (multiquadratic), "CSRBF" (compactly supported RBF)
+                       or "LDW" (local distance weighted)
+        :param space: "image" to interpolate over GCP (x, y), "ground" over GCP (X, Y)
+        :param n: LDW neighbour count
+        :param r: LDW norm order
+        :param chunk_size: Optional queries per chunk
+        :return: (M x 4) array of interpolated dx, dy, dX, dY
+        """
+        chunk = {} if chunk_size is None else {"chunk_size": chunk_size}
+        if method == "MQ":
+            return self.mq_interpolate(queries, space, **chunk)
+        if method == "CSRBF":
+            return self.csrbf_interpolate(queries, space, **chunk)
+        if method == "LDW":
+            return self.ldw_interpolate(queries, n, r, space=space, **chunk)
+        raise ValueError(f"Unknown pointwise method '{method}'; expected 'MQ', 'CSRBF' or 'LDW'.")
+
+    def select_closest(self, queries, n, r, space="image"):
+        """
+        Find, for a batch of query points, n GCPs spread over the 4 quadrants:
+        the ceil(n/4) closest in each quadrant, of which the n closest are kept.
+        Queries whose quadrants cannot supply n GCPs fall back to their n nearest GCPs.
+        :param queries: Query points (M x 2 array)
+        :param n: Number of GCPs per query
+        :param r: Norm order for distance calculation
+        :param space: "image" or "ground" GCP coordinates
+        :return: (M x n) array of GCP indices (fewer columns if there are fewer than n GCPs)
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        index = self.spatial_index(space)
+        per_quadrant = -(-n // 4)
+        dist, selected = index.quadrant_nearest(queries, k=per_quadrant, p=r)
+        dist = dist.reshape(len(queries), 4 * per_quadrant)
+        selected = selected.reshape(len(queries), 4 * per_quadrant)
+        if 4 * per_quadrant > n:
+            # Empty slots have infinite distance and sort last
+            keep = np.argsort(dist, axis=1, kind="stable")[:, :n]
+            selected = np.take_along_axis(selected, keep, axis=1)
+
+        fallback = np.any(selected < 0, axis=1)
+        if np.any(fallback):
+            _, nearest = index.nearest(queries[fallback], n, p=r)
+            if nearest.shape[1] < n:
+                # Fewer than n GCPs: no query can fill its quadrants, so all fell back
+                return nearest
+            selected[fallback] = nearest
+        return selected
+
+    def select_four_closest(self, queries, r):
+        """
+        Find, for a batch of query points, the closest GCP in each of the 4 quadrants.
+        Queries with an empty quadrant fall back to their 4 nearest GCPs overall.
+        :param queries: Query points (M x 2 array)
+        :param r: Norm order for distance calculation
+        :return: (M x 4) array of GCP indices
+        """
+        return self.select_closest(queries, 4, r)
+
     def find_four_closest(self, icp, r):
         """
         Find the 4 closest GCPs that are in different quadrants around an ICP.
         :param icp: A single ICP point (x, y)
         :param r: Norm order for distance calculation
-        :return: 4 selected GCPs and their dx, dy, dX, dY values
-        """
-        distances = np.linalg.norm(self.gcp_coords_xy - icp, axis=1, ord=r)
-        quadrants = [[], [], [], []]
-        
-        for i, (gcp, dist) in enumerate(zip(self.gcp_coords_xy, distances)):
-            if gcp[0] >= icp[0] and gcp[1] >= icp[1]:
-                quadrants[0].append((i, dist)) 
-            elif gcp[0] < icp[0] and gcp[1] >= icp[1]:
-                quadrants[1].append((i, dist)) 
-            elif gcp[0] < icp[0] and gcp[1] < icp[1]:
-                quadrants[2].append((i, dist))  
-            elif gcp[0] >= icp[0] and gcp[1] < icp[1]:
-                quadrants[3].append((i, dist))  
-        
-        selected = []
-        for quad in quadrants:
-            if quad:
-                quad.sort(key=lambda x: x[1])
-                selected.append(quad[0][0])
-        
-        if len(selected) < 4:
-            selected = sorted(range(len(distances)), key=lambda i: distances[i])[:4]
-        
-        return selected
-    
+        :return: Indices of the 4 selected GCPs
+        """
+        return self.select_four_closest(np.asarray(icp)[None, :], r)[0].tolist()
+
+    def ldw_interpolate(self, queries, n=4, r=2, chunk_size=65536, space="image"):
+        """
+        Local Distance Weighted interpolation of the GCP displacements at arbitrary points.
+        Weights for a whole chunk of queries are one (chunk x n) array, and all four
+        displacement components are reduced in the same pass.
+        :param queries: Query points in image space (M x 2 array)
+        :param n: Number of GCPs per query
+        :param r: Norm order for distance calculation
+        :param chunk_size: Queries per chunk, bounding the temporary memory
+        :param space: "image" or "ground" GCP coordinates (queries are in the same space)
+        :return: (M x 4) array of interpolated dx, dy, dX, dY
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        gcp_coords = self.gcp_coords(space)
+        values = np.column_stack([self.dx, self.dy, self.dX, self.dY])
+        result = np.empty((len(queries), 4))
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            indices = self.select_closest(chunk, n, r, space)
+
+            distances = np.linalg.norm(gcp_coords[indices] - chunk[:, None, :], axis=2, ord=r)
+            weights = 1 / (distances + 1e-10)  # Avoid division by zero
+
+            result[start:start + chunk_size] = (
+                np.einsum("mk,mkc->mc", weights, values[indices]) / weights.sum(axis=1)[:, None]
+            )
+        return result
+
     def LDW(self, n, r):
         """
         Perform Local Distance Weighted interpolation.
@@ -92,30 +356,43 @@ class Pointwise:
         :param r: Norm order for distance calculation
         :return: Interpolated dx, dy, dX, dY for each ICP
         """
-        icp_dx = []
-        icp_dy = []
-        icp_dX = []
-        icp_dY = []
-        
-        for icp in self.icp_coords_xy:
-            indices = self.find_four_closest(icp, r)
-            selected_gcps = self.gcp_coords_xy[indices]
-            selected_dx = self.dx[indices]
-            selected_dy = self.dy[indices]
-            selected_dX = self.dX[indices]
-            selected_dY = self.dY[indices]
-            
-            distances = np.linalg.norm(selected_gcps - icp, axis=1, ord=r)
-            weights = 1 / (distances + 1e-10)  # Avoid division by zero
-            
-            weighted_dx = np.sum(weights * selected_dx) / np.sum(weights)
-            weighted_dy = np.sum(weights * selected_dy) / np.sum(weights)
-            weighted_dX = np.sum(weights * selected_dX) / np.sum(weights)
-            weighted_dY = np.sum(weights * selected_dY) / np.sum(weights)
-            
-            icp_dx.append(weighted_dx)
-            icp_dy.append(weighted_dy)
-            icp_dX.append(weighted_dX)
-            icp_dY.append(weighted_dY)
-        
-        return np.array(icp_dx), np.array(icp_dy), np.array(icp_dX), np.array(icp_dY)
+        result = self.ldw_interpolate(self.icp_coords_xy, n, r)
+        return result[:, 0], result[:, 1], result[:, 2], result[:, 3]
+
+
+class CorrectionField:
+    """
+    Dense image-space correction to a ground -> image polynomial mapping.
+    The GCP residuals (actual - predicted image coordinates) are interpolated in ground
+    space with MQ or LDW, so that x = f(X, Y) + dx(X, Y) reproduces the GCPs. Instances
+    are picklable callables with the `WarpGrid` transform signature.
+    """
+
+    def __init__(self, gcps, forward_transform, backward_transform=None, method="MQ", n=4, r=2):
+        """
+        :param gcps: PointSet (or list of point dicts) of the control points
+        :param forward_transform: Compiled ground -> image transform being corrected
+        :param backward_transform: Optional image -> ground transform, for the dX, dY residuals
+        :param method: "MQ", "CSRBF" or "LDW"
+        :param n: LDW neighbour count
+        :param r: LDW norm order
+        """
+        gcps = as_point_set(gcps)
+        predicted_x, predicted_y = forward_transform.transform_points(gcps.ground_XY)
+        if backward_transform is not None:
+            predicted_X, predicted_Y = backward_transform.transform_points(gcps.image_xy)
+        else:
+            predicted_X, predicted_Y = gcps.X, gcps.Y
+
+        self.pointwise = Pointwise(gcps, None, gcps.x - predicted_x, gcps.y - predicted_y,
+                                   gcps.X - predicted_X, gcps.Y - predicted_Y)
+        self.method = method
+        self.n = n
+        self.r = r
+
+    def __call__(self, points):
+        """
+        Image-space correction (dx, dy) at an (N, 2) array of ground points.
+        """
+        result = self.pointwise.interpolate(points, self.method, "ground", self.n, self.r)
+        return result[:, 0], result[:, 1]
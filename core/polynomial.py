@@ -1,21 +1,145 @@
 import numpy as np
 
+from core.lstsq import LeastSquares
+from core.points import as_point_set
+
+
+def num_terms(degree):
+    """
+    Number of terms x^i * y^j with i + j <= degree.
+    """
+    return (degree + 1) * (degree + 2) // 2
+
+
+def design_matrix(x, y, degree, dtype=np.float64):
+    """
+    Build the design matrix of the terms x^i * y^j, ordered by i then j.
+    Powers are accumulated with running products instead of recomputed per term.
+    """
+    x = np.asarray(x, dtype=dtype)
+    y = np.asarray(y, dtype=dtype)
+    A = np.empty((len(x), num_terms(degree)), dtype=dtype, order="F")
+
+    x_power = np.ones(len(x), dtype=dtype)
+    idx = 0
+    for i in range(degree + 1):
+        A[:, idx] = x_power
+        for j in range(1, degree + 1 - i):
+            np.multiply(A[:, idx + j - 1], y, out=A[:, idx + j])
+        idx += degree + 1 - i
+        x_power *= x
+
+    return A
+
+
+def evaluate_polynomial(coeffs, x, y, degree, out=None, work=None):
+    """
+    Evaluate sum(c_ij * x^i * y^j) with nested Horner schemes, without a design matrix:
+    p(x, y) = q_0(y) + x * (q_1(y) + x * (... + x * q_d(y))), q_i(y) = sum_j c_ij y^j.
+    The result is written to `out`; `work` is an optional scratch buffer of the same shape.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if out is None:
+        out = np.empty(x.shape, dtype=np.result_type(x, y, np.float32))
+    if work is None:
+        work = np.empty_like(out)
+
+    for i in range(degree, -1, -1):
+        start = i * (degree + 1) - i * (i - 1) // 2
+        last = degree - i
+
+        work.fill(coeffs[start + last])
+        for j in range(last - 1, -1, -1):
+            np.multiply(work, y, out=work)
+            work += coeffs[start + j]
+
+        if i == degree:
+            out[...] = work
+        else:
+            np.multiply(out, x, out=out)
+            out += work
+
+    return out
+
+
+class CompiledTransform:
+    """
+    A fitted forward or backward transform, prepared once for repeated evaluation.
+    Input normalization becomes a fused scale-and-offset per axis, and output
+    denormalization is folded into the coefficients (scaled by the std, with the
+    mean added to the constant term), so evaluating needs no dict lookups and no
+    temporaries beyond the caller's buffers.
+    """
+
+    def __init__(self, coeffs, normalization_factors, degree, forward=True):
+        """
+        :param coeffs: (coeffs_1, coeffs_2) in normalized units, as returned by regress_polynomial
+        :param normalization_factors: The `normalization_factors` dict of the fitted Polynomial
+        :param degree: Polynomial degree
+        :param forward: True for ground (X, Y) -> image (x, y), False for the inverse
+        """
+        in_keys, out_keys = (("X", "Y"), ("x", "y")) if forward else (("x", "y"), ("X", "Y"))
+        self.degree = degree
+        self.forward = forward
+
+        self.in_scale = np.array([1.0 / normalization_factors[key + "_std"] for key in in_keys])
+        self.in_offset = np.array([-normalization_factors[key + "_mean"] / normalization_factors[key + "_std"]
+                                   for key in in_keys])
+
+        self.coeffs = np.empty((2, num_terms(degree)))
+        for row, (coeff, key) in enumerate(zip(coeffs, out_keys)):
+            self.coeffs[row] = np.asarray(coeff, dtype=np.float64) * normalization_factors[key + "_std"]
+            self.coeffs[row, 0] += normalization_factors[key + "_mean"]
+
+    def __call__(self, x, y, out_1=None, out_2=None):
+        """
+        Evaluate both outputs at the points (x, y); results go to `out_1`/`out_2` if given.
+        """
+        u = np.multiply(x, self.in_scale[0], dtype=np.float64)
+        u += self.in_offset[0]
+        v = np.multiply(y, self.in_scale[1], dtype=np.float64)
+        v += self.in_offset[1]
+        work = np.empty_like(u)
+
+        out_1 = evaluate_polynomial(self.coeffs[0], u, v, self.degree, out=out_1, work=work)
+        out_2 = evaluate_polynomial(self.coeffs[1], u, v, self.degree, out=out_2, work=work)
+        return out_1, out_2
+
+    def transform_points(self, points):
+        """
+        Evaluate at an (N, 2) array of points.
+        """
+        return self(points[:, 0], points[:, 1])
+
+
 class Polynomial:
     def __init__(self, gcp_points, degree):
-        self.gcp_points = gcp_points
+        """
+        :param gcp_points: PointSet (or list of point dicts) of the control points
+        :param degree: Polynomial degree
+        """
+        self.gcp_points = as_point_set(gcp_points)
         self.degree = degree
         self.normalization_factors = None
         self.design_matrix_forward = None
         self.design_matrix_backward = None
+        self.forward_fit = None
+        self.backward_fit = None
+        self.forward_targets = None
+        self.backward_targets = None
+        self.forward_weights = None
+        self.backward_weights = None
+        self.robust_iterations = None
+        self.forward_transform = None
+        self.backward_transform = None
 
     def normalize_data(self):
         """
         Normalize the GCP data and keep normalization factors.
         """
-        x = np.array([point['x'] for point in self.gcp_points])
-        y = np.array([point['y'] for point in self.gcp_points])
-        X = np.array([point['X'] for point in self.gcp_points])
-        Y = np.array([point['Y'] for point in self.gcp_points])
+        x, y = self.gcp_points.x, self.gcp_points.y
+        X, Y = self.gcp_points.X, self.gcp_points.Y
 
         self.normalization_factors = {
             "x_mean": x.mean(), "x_std": x.std(),
@@ -35,67 +159,163 @@ class Polynomial:
         """
         Build the design matrix for polynomial regression.
         """
-        num_terms = (self.degree + 1) * (self.degree + 2) // 2
-        A = np.zeros((len(x), num_terms))
-
-        idx = 0
-        for i in range(self.degree + 1):
-            for j in range(self.degree + 1 - i):
-                A[:, idx] = (x ** i) * (y ** j)
-                idx += 1
+        return design_matrix(x, y, self.degree)
 
-        return A
-
-    def regress_polynomial(self):
+    def regress_polynomial(self, method="lstsq", **options):
         """
         Perform polynomial regression for both forward and backward transformations.
+        Each design matrix is factored once and both of its targets are solved together;
+        the factorizations are kept in `forward_fit` / `backward_fit` (see `LeastSquares`).
+
+        :param method: "lstsq" (plain least squares), "ransac", "huber" or "tukey" (IRLS).
+                       RANSAC finds the inliers on the forward model (threshold in image
+                       pixels) and fits both models on them; IRLS reweights each model on
+                       its own residuals. See `core.robust` for the options.
+        :param options: Passed to `core.robust.ransac` or `core.robust.irls`
         """
         x, y, X, Y = self.normalize_data()
 
         A_forward = self.build_design_matrix(X, Y)
         self.design_matrix_forward = A_forward
-
-        coeffs_x_forward, _, _, _ = np.linalg.lstsq(A_forward, x, rcond=None)
-        coeffs_y_forward, _, _, _ = np.linalg.lstsq(A_forward, y, rcond=None)
+        self.forward_fit = LeastSquares(A_forward)
+        self.forward_targets = np.column_stack((x, y))
 
         A_backward = self.build_design_matrix(x, y)
         self.design_matrix_backward = A_backward
+        self.backward_fit = LeastSquares(A_backward)
+        self.backward_targets = np.column_stack((X, Y))
+
+        if method == "lstsq":
+            forward_coeffs = self.forward_fit.solve(self.forward_targets)
+            backward_coeffs = self.backward_fit.solve(self.backward_targets)
+            self.forward_weights = self.backward_weights = np.ones(len(x))
+        else:
+            forward_coeffs, backward_coeffs = self._robust_fit(method, **options)
+
+        coeffs_x_forward, coeffs_y_forward = np.ascontiguousarray(forward_coeffs.T)
+        coeffs_X_backward, coeffs_Y_backward = np.ascontiguousarray(backward_coeffs.T)
 
-        coeffs_X_backward, _, _, _ = np.linalg.lstsq(A_backward, X, rcond=None)
-        coeffs_Y_backward, _, _, _ = np.linalg.lstsq(A_backward, Y, rcond=None)
+        self.forward_transform = self.compile((coeffs_x_forward, coeffs_y_forward), forward=True)
+        self.backward_transform = self.compile((coeffs_X_backward, coeffs_Y_backward), forward=False)
 
         return coeffs_x_forward, coeffs_y_forward, coeffs_X_backward, coeffs_Y_backward
 
-    def evaluate(self, coeffs, points, forward=True):
+    def _robust_fit(self, method, **options):
         """
-        Evaluate the polynomial at given points.
+        Robust coefficients of both models; the final weights of every GCP (0/1 inlier
+        flags for RANSAC) go to `forward_weights` / `backward_weights` and the iteration
+        counts to `robust_iterations`.
         """
-        coeffs_1, coeffs_2 = coeffs
+        from core.robust import irls, ransac
 
-        if forward:
-            x = np.array([point['X'] for point in points])
-            y = np.array([point['Y'] for point in points])
-            x = (x - self.normalization_factors["X_mean"]) / self.normalization_factors["X_std"]
-            y = (y - self.normalization_factors["Y_mean"]) / self.normalization_factors["Y_std"]
+        factors = self.normalization_factors
+        forward_scale = np.array([factors["x_std"], factors["y_std"]])
+        backward_scale = np.array([factors["X_std"], factors["Y_std"]])
+        A_forward, A_backward = self.design_matrix_forward, self.design_matrix_backward
+
+        if method == "ransac":
+            forward_coeffs, weights, iterations = ransac(
+                A_forward, self.forward_targets, forward_scale, **options
+            )
+            inliers = weights > 0
+            backward_coeffs = LeastSquares(A_backward[inliers]).solve(self.backward_targets[inliers])
+            self.forward_weights = self.backward_weights = weights
+            self.robust_iterations = (iterations, iterations)
+        elif method in ("huber", "tukey"):
+            forward_coeffs, self.forward_weights, forward_iterations = irls(
+                A_forward, self.forward_targets, forward_scale, weights=method, **options
+            )
+            backward_coeffs, self.backward_weights, backward_iterations = irls(
+                A_backward, self.backward_targets, backward_scale, weights=method, **options
+            )
+            self.robust_iterations = (forward_iterations, backward_iterations)
         else:
-            x = np.array([point['x'] for point in points])
-            y = np.array([point['y'] for point in points])
-            x = (x - self.normalization_factors["x_mean"]) / self.normalization_factors["x_std"]
-            y = (y - self.normalization_factors["y_mean"]) / self.normalization_factors["y_std"]
+            raise ValueError(f"Unknown regression method '{method}'; "
+                             f"expected 'lstsq', 'ransac', 'huber' or 'tukey'.")
+        return forward_coeffs, backward_coeffs
 
-        A = self.build_design_matrix(x, y)
+    def leverage(self, forward=True):
+        """
+        Leverage (hat-matrix diagonal) of every GCP in the forward or backward fit.
+        """
+        return (self.forward_fit if forward else self.backward_fit).leverage()
 
-        evaluated_1 = A @ coeffs_1
-        evaluated_2 = A @ coeffs_2
+    def coefficient_covariance(self, forward=True):
+        """
+        Covariance of the (normalized) coefficients of the forward or backward fit, scaled by
+        the residual variance of each target: a (2, T, T) array for the two coordinates.
+        """
+        fit = self.forward_fit if forward else self.backward_fit
+        targets = self.forward_targets if forward else self.backward_targets
+        return fit.covariance(fit.residual_variance(targets))
 
-        if forward:
-            evaluated_1 = (evaluated_1 * self.normalization_factors["x_std"]) + self.normalization_factors["x_mean"]
-            evaluated_2 = (evaluated_2 * self.normalization_factors["y_std"]) + self.normalization_factors["y_mean"]
-        else:
-            evaluated_1 = (evaluated_1 * self.normalization_factors["X_std"]) + self.normalization_factors["X_mean"]
-            evaluated_2 = (evaluated_2 * self.normalization_factors["Y_std"]) + self.normalization_factors["Y_mean"]
+    def loo_residuals(self, forward=True):
+        """
+        Leave-one-out residuals of every GCP, in the units of the predicted coordinates,
+        without refitting: e_i / (1 - h_i) from the residuals and leverages of the one fit.
+        Returns an (N, 2) array (x, y for forward; X, Y for backward). A GCP that the fit
+        cannot do without (h_i = 1) gets NaN.
+        """
+        return self.residual_diagnostics(forward)["loo_residuals"]
+
+    def residual_diagnostics(self, forward=True, threshold=3.0):
+        """
+        Residual diagnostics of the forward or backward fit from its single factorization.
+
+        :param forward: Diagnose the forward (ground -> image) or backward model
+        :param threshold: |studentized residual| above which a GCP is flagged as a blunder
+        :return: dict with (N, 2) arrays "residuals", "loo_residuals" and "studentized"
+                 (externally studentized residuals), (N,) "leverage", the (2,) "loo_rmse",
+                 and "blunders", the indices of the GCPs whose largest |studentized|
+                 residual exceeds `threshold`.
+        """
+        fit = self.forward_fit if forward else self.backward_fit
+        targets = self.forward_targets if forward else self.backward_targets
+        keys = ("x_std", "y_std") if forward else ("X_std", "Y_std")
+        scale = np.array([self.normalization_factors[key] for key in keys])
+
+        residuals = fit.residuals(targets)
+        leverage = fit.leverage()
+        dof = fit.dof
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            one_minus_h = np.where(leverage < 1.0 - 1e-10, 1.0 - leverage, np.nan)[:, None]
+            loo = residuals / one_minus_h
+            # Residual variance with point i deleted, then t_i = e_i / (s_(i) sqrt(1 - h_i))
+            rss = np.sum(residuals ** 2, axis=0)
+            deleted_var = (rss - residuals ** 2 / one_minus_h) / (dof - 1) if dof > 1 \
+                else np.full_like(residuals, np.nan)
+            studentized = residuals / np.sqrt(deleted_var * one_minus_h)
+
+        loo_scaled = loo * scale
+        defined = np.isfinite(loo_scaled)
+        count = defined.sum(axis=0)
+        loo_rmse = np.sqrt(np.where(defined, loo_scaled ** 2, 0.0).sum(axis=0) / np.maximum(count, 1))
+        loo_rmse[count == 0] = np.nan
+        worst = np.where(np.isfinite(studentized), np.abs(studentized), 0.0).max(axis=1)
+        return {
+            "residuals": residuals * scale,
+            "leverage": leverage,
+            "loo_residuals": loo_scaled,
+            "loo_rmse": loo_rmse,
+            "studentized": studentized,
+            "blunders": np.flatnonzero(worst > threshold),
+        }
+
+    def compile(self, coeffs, forward=True):
+        """
+        Build a CompiledTransform for the given coefficients and this fit's normalization.
+        """
+        return CompiledTransform(coeffs, self.normalization_factors, self.degree, forward)
 
-        return evaluated_1, evaluated_2
+    def evaluate(self, coeffs, points, forward=True):
+        """
+        Evaluate the polynomial at given points (a PointSet or list of point dicts).
+        """
+        points = as_point_set(points)
+        if forward:
+            return self.compile(coeffs, forward)(points.X, points.Y)
+        return self.compile(coeffs, forward)(points.x, points.y)
 
 
     def rmse(self, predicted_1, predicted_2, actual_1, actual_2):
@@ -36,7 +36,19 @@ class Project:
         self.rmse_X_backward = None
         self.rmse_Y_backward = None
         self.gcp_filepath = None
+        # Resampling cache directory and size bound (None = core.cache defaults)
+        self.resampling_cache_dir = None
+        self.resampling_cache_bytes = None
         
+    def resampling_cache(self):
+        """
+        The resampling cache of this project (see `core.cache.ResamplingCache`).
+        """
+        from core.cache import DEFAULT_CACHE_BYTES, ResamplingCache
+
+        return ResamplingCache(getattr(self, "resampling_cache_dir", None),
+                               getattr(self, "resampling_cache_bytes", None) or DEFAULT_CACHE_BYTES)
+
     def set_predicted(self, X, x, Y, y):
         self.predicted_x = x
         self.predicted_X = X 
@@ -62,15 +74,30 @@ class Project:
         self.dY = np.array(dY)
 
     def save_to_file(self, filename):
-        with open(filename + ".kntu", 'wb') as file:
-            pickle.dump(self.__dict__, file)
-        print("Project saved successfully!")  
+        """
+        Save the project to `filename` (".kntu" is appended when missing) in the binary
+        container of `core.project_file`. Saving again to the same file only appends
+        the arrays that changed.
+        """
+        from core.project_file import write_project
 
+        if not filename.endswith(".kntu"):
+            filename += ".kntu"
+        stats = write_project(filename, self.__dict__)
+        print(f"Project saved successfully! ({stats['written_bytes']} bytes written, "
+              f"{stats['reused_sections']} unchanged arrays kept)")
+        return stats
 
     def load_from_file(self, filename):
         """
-        Load the state of the Project instance from a file using pickle.
+        Load the state of the Project instance from a file. Arrays of a binary container
+        are memory-mapped; projects saved by older versions (pickles) are still read.
         """
-        with open(filename, 'rb') as file:
-            data = pickle.load(file)
-            self.__dict__.update(data)
+        from core.project_file import is_project_container, read_project
+
+        if is_project_container(filename):
+            data = read_project(filename)
+        else:
+            with open(filename, 'rb') as file:
+                data = pickle.load(file)
+        self.__dict__.update(data)
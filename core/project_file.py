@@ -0,0 +1,184 @@
+"""
+Versioned binary container for Project state (`.kntu` files).
+
+Layout:
+    [0, 8)      magic b"KNTUPRJ\\0"
+    [8, 12)     format version, uint32 little endian
+    [12, 20)    offset of the JSON index, uint64 little endian
+    [20, 28)    length of the JSON index, uint64 little endian
+    ...         raw array sections, each aligned to ALIGNMENT bytes
+    ...         the JSON index
+
+The index holds every field as JSON; arrays are replaced by references to their raw
+sections ({"__array__": key}), which are memory-mapped on load. Saving to an existing
+container keeps the sections whose content (dtype, shape and digest) did not change,
+appends the changed ones, writes a new index after them and only then updates the
+header, so an interrupted save leaves the previous state readable. The file is
+rewritten from scratch once the superseded bytes outweigh the live ones.
+"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+
+import numpy as np
+
+from core.points import PointSet
+
+MAGIC = b"KNTUPRJ\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQQ")
+ALIGNMENT = 64
+
+
+def is_project_container(path):
+    """True if `path` starts with the container magic (False for legacy pickles)."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def _digest(array):
+    return hashlib.sha1(np.ascontiguousarray(array).reshape(-1).view(np.uint8)).hexdigest()
+
+
+def _encode(value, key, arrays):
+    """
+    JSON-encode `value`; arrays (and, as a last resort, unknown objects as pickles) are
+    collected in `arrays` under keys derived from their field path.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating, np.bool_)):
+        return value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        arrays[key] = value
+        return {"__array__": key}
+    if isinstance(value, PointSet):
+        return {"__pointset__": {name: _encode(getattr(value, name), f"{key}.{name}", arrays)
+                                 for name in ("data", "ids", "icp")}}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item, f"{key}.{i}", arrays) for i, item in enumerate(value)]}
+    if isinstance(value, list):
+        return [_encode(item, f"{key}.{i}", arrays) for i, item in enumerate(value)]
+    if isinstance(value, dict) and all(isinstance(name, str) for name in value):
+        return {"__dict__": {name: _encode(item, f"{key}.{name}", arrays) for name, item in value.items()}}
+    arrays[key] = np.frombuffer(pickle.dumps(value), dtype=np.uint8)
+    return {"__pickle__": key}
+
+
+def _decode(value, arrays):
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__array__" in value:
+        return arrays[value["__array__"]]
+    if "__pointset__" in value:
+        parts = {name: _decode(item, arrays) for name, item in value["__pointset__"].items()}
+        return PointSet(parts["data"], ids=parts["ids"], icp=parts["icp"])
+    if "__tuple__" in value:
+        return tuple(_decode(item, arrays) for item in value["__tuple__"])
+    if "__dict__" in value:
+        return {name: _decode(item, arrays) for name, item in value["__dict__"].items()}
+    if "__pickle__" in value:
+        return pickle.loads(arrays[value["__pickle__"]].tobytes())
+    raise ValueError(f"Unknown project field encoding: {sorted(value)}")
+
+
+def _read_index(file):
+    file.seek(0)
+    magic, version, index_offset, index_length = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a project container.")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Project format version {version} is newer than this toolbox "
+                         f"supports ({FORMAT_VERSION}).")
+    file.seek(index_offset)
+    index = json.loads(file.read(index_length).decode("utf-8"))
+    return index, index_offset + index_length
+
+
+def _write_section(file, array):
+    end = file.seek(0, os.SEEK_END)
+    offset = end + (-end % ALIGNMENT)
+    file.seek(offset)
+    file.write(np.ascontiguousarray(array).tobytes())
+    return offset
+
+
+def write_project(path, fields):
+    """
+    Save a dict of project fields to `path`, reusing unchanged sections of an existing
+    container there. Returns {"written_bytes", "reused_sections", "rewritten"}.
+    """
+    arrays = {}
+    encoded = {name: _encode(value, name, arrays) for name, value in fields.items()}
+
+    previous, end = {}, 0
+    if os.path.exists(path) and is_project_container(path):
+        with open(path, "rb") as file:
+            try:
+                index, end = _read_index(file)
+                previous = index["arrays"]
+            except (ValueError, KeyError, struct.error):
+                previous = {}
+
+    sections, reused = {}, 0
+    for key, array in arrays.items():
+        entry = {"dtype": array.dtype.str, "shape": list(array.shape), "digest": _digest(array)}
+        old = previous.get(key)
+        if old is not None and all(old[name] == entry[name] for name in entry):
+            entry["offset"] = old["offset"]
+            reused += 1
+        sections[key] = entry
+
+    live = sum(array.nbytes for array in arrays.values())
+    appended = sum(arrays[key].nbytes for key, entry in sections.items() if "offset" not in entry)
+    rewrite = not previous or (end + appended) > 2 * live + 4096
+    if rewrite:
+        for entry in sections.values():
+            entry.pop("offset", None)
+        reused = 0
+
+    temporary = path + ".tmp"
+    target = temporary if rewrite else path
+    with open(target, "wb" if rewrite else "r+b") as file:
+        if rewrite:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+        start = file.seek(0, os.SEEK_END)
+        for key, entry in sections.items():
+            if "offset" not in entry:
+                entry["offset"] = _write_section(file, arrays[key])
+
+        index = json.dumps({"version": FORMAT_VERSION, "fields": encoded, "arrays": sections}).encode("utf-8")
+        index_offset = file.seek(0, os.SEEK_END)
+        file.write(index)
+        file.flush()
+        os.fsync(file.fileno())
+        written = file.tell() - start
+        # The header is updated last, so a partial save leaves the old index in charge
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, index_offset, len(index)))
+    if rewrite:
+        os.replace(temporary, path)
+    return {"written_bytes": written, "reused_sections": reused, "rewritten": rewrite}
+
+
+def read_project(path, mmap=True):
+    """
+    Load the project fields saved by `write_project`. Arrays are memory-mapped
+    copy-on-write (edits stay in memory) unless `mmap` is False.
+    """
+    arrays = {}
+    with open(path, "rb") as file:
+        index, _ = _read_index(file)
+        for key, entry in index["arrays"].items():
+            dtype, shape = np.dtype(entry["dtype"]), tuple(entry["shape"])
+            count = int(np.prod(shape))
+            if mmap and count > 0:
+                arrays[key] = np.memmap(path, dtype=dtype, mode="c", offset=entry["offset"], shape=shape)
+            else:
+                file.seek(entry["offset"])
+                arrays[key] = np.fromfile(file, dtype=dtype, count=count).reshape(shape)
+    return {name: _decode(value, arrays) for name, value in index["fields"].items()}
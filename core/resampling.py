@@ -1,81 +1,65 @@
+import contextlib
+import json
+import os
+import time
 import numpy as np
-from PySide6.QtWidgets import QGraphicsPixmapItem
 from core.project import Project
-from core.polynomial import Polynomial
-from scipy.ndimage import map_coordinates
-from PySide6.QtCore import QObject, Signal, Slot
-from PySide6.QtGui import QImage
-
-global canceled
-canceled = None 
-
-class ResamplingWorker(QObject):
-    finished = Signal()           
-    progress = Signal(float)
-    error = Signal(str)         
-    resampled = Signal(np.ndarray)
-
-    def __init__(self, image, gcp_points, icp_points, step, degree):
-        super().__init__()
-        self.image = image
-        self.gcp_points = gcp_points
-        self.icp_points = icp_points
-        self.step = step
-        self.degree = degree
-        self._is_cancelled = False 
-
-    @Slot()
-    def run(self):
-        """
-        Perform the resampling in the background using backward parameters.
-        """
-        try:
-            resampling = Resampling(
-                image=self.image,
-                gcp_points=self.gcp_points,
-                icp_points=self.icp_points,
-                degree=self.degree
-            )
-
-            grd_image = resampling.resample(
-                step=self.step,
-                progress_callback=self.progress.emit,
-                cancel_flag=lambda: self._is_cancelled
-            )
-
-            if not self._is_cancelled and grd_image is not None:
-                np.save("resampled_grid.npy", grd_image)
-                self.resampled.emit(grd_image)
+from core.points import as_point_set
+from core.polynomial import CompiledTransform, Polynomial
+from core.pointwise import CorrectionField
+from core.warp_grid import WarpGrid
+from core.interpolation import INTERPOLATION_KERNELS, get_kernel
+from core.image_source import open_image_source
+from core.cache import image_fingerprint, resampling_key
+from core.parallel import (SharedArray, init_tile_worker, make_executor,
+                           resample_tile_job, run_pooled)
+
+# Options of `Resampling.resample` that decide the output pixels, with their defaults
+MAPPING_DEFAULTS = {
+    "interpolation": "bilinear",
+    "warp_grid": None,
+    "warp_tolerance": 0.1,
+    "warp_order": 1,
+    "correction": None,
+    "correction_spacing": 32,
+    "correction_n": 4,
+    "correction_r": 2,
+}
+
+
+def mapping_options(**options):
+    """
+    The complete mapping options: `MAPPING_DEFAULTS` updated with `options`.
+    """
+    unknown = set(options) - set(MAPPING_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Unknown mapping options: {', '.join(sorted(unknown))}")
+    return dict(MAPPING_DEFAULTS, **options)
 
-            self.finished.emit()
-
-        except Exception as e:
-            self.error.emit(str(e))
-
-    def cancel(self):
-        """
-        Set the cancellation flag to stop the resampling process.
-        """
-        self._is_cancelled = True
 
 class Resampling:
     def __init__(self, image, gcp_points, icp_points, degree):
         """
         Initialize the Resampling class with backward transform coefficients.
+        `image` may be a QImage, a NumPy array, an `ImageSource`, or a path to a `.npy`,
+        raw/ENVI or regular image file (see `core/image_source.py`).
         """
-        self.image = self.qimage_to_numpy(image)
-        self.gcp_points = gcp_points
-        self.icp_points = icp_points
+        self.source = open_image_source(image)
+        self.gcp_points = as_point_set(gcp_points)
+        self.icp_points = as_point_set(icp_points)
         self.poly = Polynomial(gcp_points, degree)
+        self.warp_grid = None
+        self.correction_grid = None
+        self.interpolation = "bilinear"
+        self.completed = False
+        # Opened from a file, the source is fingerprinted from it rather than its pixels
+        self.image_path = os.fspath(image) if isinstance(image, (str, os.PathLike)) else None
+        self._source_fingerprint = None
 
         # Extract image dimensions
-        if self.image is not None:
-            self.image_height, self.image_width, _ = self.image.shape
-        else:
-            self.image_height = None
-            self.image_width = None
+        self.image_height, self.image_width, self.bands = self.source.shape
 
-        print("Loaded image shape:", self.image.shape)
+        print("Source image shape:", self.source.shape)
 
         project = Project.get_instance()
         self.normalization_factors = project.normalization_factor
@@ -83,71 +67,41 @@ class Resampling:
         self.forward_coeffs = project.forward_coeffs
         self.degree = project.degree
 
-    @staticmethod
-    def qimage_to_numpy(image) -> np.ndarray:
-        """
-        Convert a QImage to a NumPy array (height, width, 3) for RGB.
-        """
-        if image is None or image.isNull():
-            raise ValueError("Invalid QImage provided.")
-        
-        image = image.convertToFormat(QImage.Format.Format_RGB32)
-        
-        width, height = image.width(), image.height()
-        
-        ptr = image.bits()  # Returns a sip.voidptr
-        arr = np.frombuffer(ptr, dtype=np.uint8).reshape((height, width, 4))  # (H, W, 4)
-        return arr[..., :3].astype(np.float32)
-
-    def build_design_matrix(self, x, y):
-        """Build the design matrix for polynomial regression."""
-        num_terms = (self.degree + 1) * (self.degree + 2) // 2
-        A = np.zeros((len(x), num_terms), dtype=np.float32)
-
-        idx = 0
-        for i in range(self.degree + 1):
-            for j in range(self.degree + 1 - i):
-                A[:, idx] = (x ** i) * (y ** j)
-                idx += 1
-
-        return A
-    
-    def evaluate(self, coeffs, points, forward=True):
-        coeffs_1, coeffs_2 = coeffs
-
-        x, y = points[:, 0], points[:, 1]
-
-        # Normalize input
-        if forward:
-            x = (x - self.normalization_factors["X_mean"]) / self.normalization_factors["X_std"]
-            y = (y - self.normalization_factors["Y_mean"]) / self.normalization_factors["Y_std"]
-        else:
-            x = (x - self.normalization_factors["x_mean"]) / self.normalization_factors["x_std"]
-            y = (y - self.normalization_factors["y_mean"]) / self.normalization_factors["y_std"]
-
-        A = self.build_design_matrix(x, y)
+        # Normalization folded into the transforms once, reused by every tile.
+        self.forward_transform = CompiledTransform(
+            self.forward_coeffs, self.normalization_factors, self.degree, forward=True
+        )
+        self.backward_transform = CompiledTransform(
+            self.backward_coeffs, self.normalization_factors, self.degree, forward=False
+        )
 
-        evaluated_1 = A @ coeffs_1
-        evaluated_2 = A @ coeffs_2
+    def source_fingerprint(self):
+        """
+        Fingerprint of the source image (see `core.cache.image_fingerprint`), computed
+        once per Resampling since in-memory images are hashed in full.
+        """
+        if self._source_fingerprint is None:
+            self._source_fingerprint = image_fingerprint(self.image_path or self.source)
+        return self._source_fingerprint
 
-        # Denormalize output
-        if forward:
-            evaluated_1 = (evaluated_1 * self.normalization_factors["x_std"]) + self.normalization_factors["x_mean"]
-            evaluated_2 = (evaluated_2 * self.normalization_factors["y_std"]) + self.normalization_factors["y_mean"]
+    def evaluate(self, coeffs, points, forward=True):
+        """
+        Evaluate a polynomial transform at (N, 2) points. The project's own coefficients
+        use the precompiled transforms; other coefficients are compiled on the fly.
+        """
+        if forward and coeffs is self.forward_coeffs:
+            transform = self.forward_transform
+        elif not forward and coeffs is self.backward_coeffs:
+            transform = self.backward_transform
         else:
-            evaluated_1 = (evaluated_1 * self.normalization_factors["X_std"]) + self.normalization_factors["X_mean"]
-            evaluated_2 = (evaluated_2 * self.normalization_factors["Y_std"]) + self.normalization_factors["Y_mean"]
+            transform = CompiledTransform(coeffs, self.normalization_factors, self.degree, forward)
+        return transform.transform_points(points)
 
-        return evaluated_1, evaluated_2
-
-    def resample(self, step=1.0, progress_callback=None, cancel_flag=None, chunk_size=500):
+    def output_grid(self, step):
         """
-        Resample the image using pre-computed polynomial transforms.
-        Vectorized bilinear interpolation is used to speed up processing.
+        Compute the ground-space output grid covering the image footprint.
+        Returns the X coordinates of the columns and the Y coordinates of the rows.
         """
-        if self.image is None:
-            raise ValueError("No image loaded for resampling.")
-
         corners_pixel = np.array([
             [0,                  0],
             [self.image_width-1, 0],
@@ -165,71 +119,328 @@ class Resampling:
         print("Ground corners bounding box (minX, maxX, minY, maxY):",
               minX, maxX, minY, maxY)
 
-        # 2) Create output grid coordinates (in ground space)
         x_vals = np.arange(minX, maxX + step, step, dtype=np.float32)
         y_vals = np.arange(maxY, minY - step, -step, dtype=np.float32)
+        return x_vals, y_vals
 
-        out_h = len(y_vals) 
-        out_w = len(x_vals)  
+    def map_tile(self, x_vals, y_vals, start_row=0, start_col=0):
+        """
+        Image coordinates of every pixel of an output tile, flattened row by row.
+        Uses the warp grid when one is active, otherwise the exact forward polynomial,
+        plus the interpolated pointwise correction field when one is active.
+        """
+        tile_h, tile_w = len(y_vals), len(x_vals)
 
-        resampled_img = np.zeros((out_h, out_w, 3), dtype=np.float32)
+        if self.warp_grid is not None:
+            img_x_vals, img_y_vals = self.warp_grid.interpolate_tile(
+                start_row, start_row + tile_h, start_col, start_col + tile_w
+            )
+            img_x_vals, img_y_vals = img_x_vals.reshape(-1), img_y_vals.reshape(-1)
+        else:
+            yy = np.repeat(y_vals, tile_w)
+            xx = np.tile(x_vals, tile_h)
+            img_x_vals, img_y_vals = self.forward_transform(xx, yy)
 
-        total_rows = out_h
-        for start_row in range(0, out_h, chunk_size):
-            if cancel_flag and cancel_flag():
-                print("Resampling cancelled at row:", start_row)
-                break
+        if self.correction_grid is not None:
+            dx, dy = self.correction_grid.interpolate_tile(
+                start_row, start_row + tile_h, start_col, start_col + tile_w
+            )
+            img_x_vals = img_x_vals + dx.reshape(-1).astype(img_x_vals.dtype)
+            img_y_vals = img_y_vals + dy.reshape(-1).astype(img_y_vals.dtype)
 
+        return img_x_vals, img_y_vals
 
-            end_row = min(start_row + chunk_size, out_h)
-            current_chunk_size = end_row - start_row
+    def resample_tile(self, x_vals, y_vals, start_row=0, start_col=0):
+        """
+        Resample one output tile whose columns lie at ground `x_vals` and rows at ground `y_vals`.
+        `start_row`/`start_col` locate the tile in the output grid (needed by the warp grid).
+        Pixels are interpolated with the kernel named by `self.interpolation` (see
+        `core/interpolation.py`); pixels mapping outside the image stay black.
+        Returns a uint8 array of shape (len(y_vals), len(x_vals), bands).
+        """
+        tile_h, tile_w = len(y_vals), len(x_vals)
 
-           
-            yy = np.repeat(y_vals[start_row:end_row], out_w)
-            xx = np.tile(x_vals, current_chunk_size)
-            ground_pts = np.column_stack((xx, yy)).astype(np.float32)
+        img_x_vals, img_y_vals = self.map_tile(x_vals, y_vals, start_row, start_col)
 
-            img_x_vals, img_y_vals = self.evaluate(
-                self.forward_coeffs, ground_pts, forward=True
-            )
+        valid_mask = (
+            (img_x_vals >= 0) &
+            (img_x_vals < (self.image_width - 1)) &
+            (img_y_vals >= 0) &
+            (img_y_vals < (self.image_height - 1))
+        )
 
-            img_x_vals = img_x_vals.reshape(current_chunk_size, out_w)
-            img_y_vals = img_y_vals.reshape(current_chunk_size, out_w)
+        tile = np.zeros((tile_h * tile_w, self.bands), dtype=np.uint8)
+        if not valid_mask.any():
+            return tile.reshape(tile_h, tile_w, self.bands)
 
-          
-            valid_mask = (
-                (img_x_vals >= 0) &
-                (img_x_vals < (self.image_width - 1)) &
-                (img_y_vals >= 0) &
-                (img_y_vals < (self.image_height - 1))
-            )
+        img_x_vals = img_x_vals[valid_mask]
+        img_y_vals = img_y_vals[valid_mask]
+
+        # Read only the source window this tile's footprint touches, padded by the
+        # kernel support so border clamping inside the window matches the full image.
+        radius = INTERPOLATION_KERNELS[self.interpolation][1]
+        start_row = max(int(np.floor(img_y_vals.min())) - radius + 1, 0)
+        end_row = min(int(np.floor(img_y_vals.max())) + radius + 1, self.image_height)
+        start_col = max(int(np.floor(img_x_vals.min())) - radius + 1, 0)
+        end_col = min(int(np.floor(img_x_vals.max())) + radius + 1, self.image_width)
+        window = self.source.read_window(start_row, end_row, start_col, end_col)
+
+        pixel_vals = get_kernel(self.interpolation)(
+            window, img_x_vals - start_col, img_y_vals - start_row
+        )
 
-            x_floor = np.floor(img_x_vals[valid_mask]).astype(np.int32)
-            y_floor = np.floor(img_y_vals[valid_mask]).astype(np.int32)
-            dx = img_x_vals[valid_mask] - x_floor
-            dy = img_y_vals[valid_mask] - y_floor
+        tile[valid_mask] = np.clip(pixel_vals, 0, 255)
+        return tile.reshape(tile_h, tile_w, self.bands)
 
-            top_left     = self.image[y_floor, x_floor]
-            top_right    = self.image[y_floor, x_floor + 1]
-            bottom_left  = self.image[y_floor + 1, x_floor]
-            bottom_right = self.image[y_floor + 1, x_floor + 1]
+    def resample(self, step=1.0, progress_callback=None, cancel_flag=None, chunk_size=500,
+                 tile_size=None, output_path=None, workers=None, executor="thread", **mapping):
+        """
+        Resample the image using pre-computed polynomial transforms.
+        The output grid is processed in tiles of `chunk_size` rows by `tile_size` columns
+        (full rows when `tile_size` is None), so only one tile is held as floats at a time.
+
+        When `output_path` is given, tiles are streamed into a memory-mapped `.npy` raster
+        instead of a RAM array. The finished tiles are tracked next to it, so calling
+        `resample` again with the same arguments after a cancel resumes where it stopped;
+        a different model, image or mapping option starts over.
+
+        With `workers` > 1 the tiles are farmed out to a `"thread"` or `"process"` pool.
+        Process workers attach to the source image and the output through shared memory
+        (or the output memmap), so nothing is copied per worker.
+
+        `warp_grid` (a node spacing in output pixels) switches to the approximate mapping
+        of `WarpGrid`: the forward polynomial is evaluated exactly only on the coarse grid
+        and interpolated in between (`warp_order` 1 = bilinear, 3 = bicubic). The spacing
+        is refined until the measured error is below `warp_tolerance` image pixels; the
+        achieved error is kept in `self.warp_grid.max_error`.
+
+        The remaining keyword arguments are the mapping options of `MAPPING_DEFAULTS`,
+        which decide the output pixels (and so the resume signature and the cache key).
+
+        `interpolation` selects the kernel: "nearest", "bilinear", "bicubic" or "lanczos".
+
+        `correction` ("MQ" or "LDW") adds the pointwise residual field of the GCPs to the
+        polynomial mapping (see `CorrectionField`). It is evaluated on a grid every
+        `correction_spacing` output pixels and bilinearly interpolated in between; LDW uses
+        `correction_n` neighbours and norm `correction_r`. The extra cost per megapixel is
+        printed and kept in `self.correction_cost`.
+        """
+        if self.source is None:
+            raise ValueError("No image loaded for resampling.")
 
-            top    = top_left + dx[:, None] * (top_right - top_left)
-            bottom = bottom_left + dx[:, None] * (bottom_right - bottom_left)
-            pixel_vals = top + dy[:, None] * (bottom - top)
+        mapping = mapping_options(**mapping)
+        interpolation = mapping["interpolation"]
+        warp_grid, warp_tolerance, warp_order = (mapping["warp_grid"], mapping["warp_tolerance"],
+                                                 mapping["warp_order"])
+        correction, correction_spacing, correction_n, correction_r = (
+            mapping["correction"], mapping["correction_spacing"],
+            mapping["correction_n"], mapping["correction_r"])
+
+        get_kernel(interpolation)
+        self.interpolation = interpolation
+
+        x_vals, y_vals = self.output_grid(step)
+        out_h = len(y_vals)
+        out_w = len(x_vals)
+        tile_w = out_w if tile_size is None else tile_size
+
+        self.warp_grid = None
+        if warp_grid:
+            self.warp_grid = WarpGrid.fit(
+                self.forward_transform.transform_points,
+                x_vals[0], y_vals[0], step, out_h, out_w,
+                spacing=warp_grid, order=warp_order, tolerance=warp_tolerance
+            )
+            if self.warp_grid is None:
+                print("Warp grid cannot meet the tolerance; using exact evaluation.")
+
+        self.correction_grid = None
+        self.correction_cost = None
+        if correction:
+            self.build_correction_grid(correction, x_vals, y_vals, step, correction_spacing,
+                                       correction_n, correction_r, min(chunk_size, out_h), tile_w)
+
+        tiles = [(row, col)
+                 for row in range(0, out_h, chunk_size)
+                 for col in range(0, out_w, tile_w)]
+
+        if output_path is None:
+            resampled_img = np.zeros((out_h, out_w, self.bands), dtype=np.uint8)
+            done = np.zeros(len(tiles), dtype=np.uint8)
+        else:
+            signature = {
+                "shape": [out_h, out_w, self.bands],
+                "origin": [float(x_vals[0]), float(y_vals[0])],
+                "step": float(step),
+                "tile": [chunk_size, tile_w],
+                "product": resampling_key(self, step, **mapping),
+            }
+            resampled_img, done = open_tiled_output(output_path, signature, len(tiles))
+            if done.any():
+                print(f"Resuming resampling: {int(done.sum())}/{len(tiles)} tiles already done.")
+
+        jobs = [(tile_idx, row, min(row + chunk_size, out_h), col, min(col + tile_w, out_w))
+                for tile_idx, (row, col) in enumerate(tiles) if not done[tile_idx]]
+
+        def tile_done(tile_idx):
+            done[tile_idx] = 1
+            if progress_callback:
+                progress_callback((float(done.sum()) / float(len(tiles))) * 100)
+
+        if not workers or workers <= 1:
+            for tile_idx, start_row, end_row, start_col, end_col in jobs:
+                if cancel_flag and cancel_flag():
+                    print("Resampling cancelled at row:", start_row)
+                    break
+                resampled_img[start_row:end_row, start_col:end_col] = self.resample_tile(
+                    x_vals[start_col:end_col], y_vals[start_row:end_row], start_row, start_col
+                )
+                tile_done(tile_idx)
+        elif executor == "thread":
+            self._resample_threaded(resampled_img, x_vals, y_vals, jobs, tile_done,
+                                    cancel_flag, workers)
+        else:
+            resampled_img = self._resample_multiprocess(resampled_img, output_path, x_vals, y_vals,
+                                                        jobs, tile_done, cancel_flag, workers, executor)
 
-            resampled_chunk = np.zeros((current_chunk_size, out_w, 3), dtype=np.float32)
+        self.completed = bool(done.all())
+        if output_path is not None:
+            resampled_img.flush()
+            done.flush()
+            if self.completed:
+                close_tiled_output(output_path)
 
-          
-            valid_flat = valid_mask.reshape(-1)
-            resampled_chunk_flat = resampled_chunk.reshape(-1, 3)
+        return resampled_img
 
-            resampled_chunk_flat[valid_flat] = pixel_vals
+    def build_correction_grid(self, method, x_vals, y_vals, step, spacing, n, r, tile_h, tile_w):
+        """
+        Evaluate the pointwise correction field on a coarse grid over the output raster
+        and estimate what it adds per output megapixel: the one-off grid evaluation
+        amortised over the raster, plus the per-tile interpolation timed on one tile.
+        """
+        out_h, out_w = len(y_vals), len(x_vals)
+
+        start = time.perf_counter()
+        field = CorrectionField(self.gcp_points, self.forward_transform, self.backward_transform,
+                                method=method, n=n, r=r)
+        self.correction_grid = WarpGrid(field, x_vals[0], y_vals[0], step, out_h, out_w,
+                                        spacing=spacing, order=1)
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.correction_grid.interpolate_tile(0, tile_h, 0, min(tile_w, out_w))
+        per_tile = time.perf_counter() - start
+
+        megapixels = out_h * out_w / 1e6
+        tile_megapixels = tile_h * min(tile_w, out_w) / 1e6
+        self.correction_cost = {
+            "setup_seconds": setup,
+            "seconds_per_megapixel": setup / megapixels + per_tile / tile_megapixels,
+        }
+        print(f"Pointwise correction ({method}, {spacing}px grid): setup {setup:.3f} s, "
+              f"+{self.correction_cost['seconds_per_megapixel']:.4f} s per megapixel")
+
+    def _resample_threaded(self, out, x_vals, y_vals, jobs, tile_done, cancel_flag, workers):
+        """
+        Resample tiles on a thread pool; every thread writes its own slice of `out`.
+        """
+        def write_tile(job):
+            tile_idx, start_row, end_row, start_col, end_col = job
+            out[start_row:end_row, start_col:end_col] = self.resample_tile(
+                x_vals[start_col:end_col], y_vals[start_row:end_row], start_row, start_col
+            )
+            return tile_idx
 
-            resampled_img[start_row:end_row, :, :] = resampled_chunk
+        with make_executor("thread", workers) as pool:
+            finished = run_pooled(pool, workers, lambda ex, job: ex.submit(write_tile, job),
+                                  jobs, tile_done, cancel_flag)
+        if not finished:
+            print("Resampling cancelled.")
 
-            progress_callback((float(end_row) / float(total_rows)) * 100)
+    def _resample_multiprocess(self, out, output_path, x_vals, y_vals, jobs, tile_done,
+                               cancel_flag, workers, executor):
+        """
+        Resample tiles on a process pool. File-backed sources are reopened by each worker;
+        in-memory sources are placed in shared memory once. Workers write into the output
+        memmap, or into a shared output buffer that is copied back into `out` at the end.
+        """
+        state = {key: value for key, value in self.__dict__.items() if key != "source"}
 
-        resampled_img_uint8 = np.clip(resampled_img, 0, 255).astype(np.uint8)
-        
-        return resampled_img_uint8
+        shared_image = None
+        if self.source.file_backed:
+            state["source"] = self.source
+        else:
+            shared_image = SharedArray.from_array(self.source.read_window(
+                0, self.image_height, 0, self.image_width
+            ))
+
+        with shared_image or contextlib.nullcontext():
+            image_descriptor = None if shared_image is None else shared_image.descriptor
+            shared_out = None
+            if output_path is not None:
+                out.flush()
+                output_descriptor = ("npy", output_path)
+            else:
+                shared_out = SharedArray.from_array(out)
+                output_descriptor = ("shm",) + shared_out.descriptor
+
+            def submit(pool, job):
+                _, start_row, end_row, start_col, end_col = job
+                return pool.submit(resample_tile_job, job, x_vals[start_col:end_col],
+                                   y_vals[start_row:end_row], output_descriptor)
+
+            try:
+                with make_executor(executor, workers, init_tile_worker,
+                                   (state, image_descriptor)) as pool:
+                    finished = run_pooled(pool, workers, submit, jobs, tile_done, cancel_flag)
+                if shared_out is not None:
+                    out[...] = shared_out.array
+            finally:
+                if shared_out is not None:
+                    shared_out.close()
+
+        if not finished:
+            print("Resampling cancelled.")
+        return out
+
+
+def _state_paths(output_path):
+    return output_path + ".state.json", output_path + ".tiles.npy"
+
+
+def open_tiled_output(output_path, signature, num_tiles):
+    """
+    Open (or create) a memory-mapped `.npy` output raster and its per-tile completion mask.
+    An existing raster is reused only if its saved signature matches: the grid shape,
+    origin, step and tiling, and the product key (`core.cache.resampling_key`, covering
+    the model, the source image and every mapping option), so a rerun with other GCPs,
+    another image, kernel, warp grid or correction starts over instead of keeping stale
+    tiles.
+    """
+    state_path, mask_path = _state_paths(output_path)
+
+    if os.path.exists(output_path) and os.path.exists(state_path) and os.path.exists(mask_path):
+        with open(state_path, "r") as file:
+            saved = json.load(file)
+        if saved == signature:
+            out = np.lib.format.open_memmap(output_path, mode="r+")
+            done = np.lib.format.open_memmap(mask_path, mode="r+")
+            if out.shape == tuple(signature["shape"]) and done.shape == (num_tiles,):
+                return out, done
+
+    out = np.lib.format.open_memmap(
+        output_path, mode="w+", dtype=np.uint8, shape=tuple(signature["shape"])
+    )
+    done = np.lib.format.open_memmap(mask_path, mode="w+", dtype=np.uint8, shape=(num_tiles,))
+    with open(state_path, "w") as file:
+        json.dump(signature, file)
+    return out, done
+
+
+def close_tiled_output(output_path):
+    """
+    Remove the resume bookkeeping of a finished tiled output.
+    """
+    for path in _state_paths(output_path):
+        if os.path.exists(path):
+            os.remove(path)
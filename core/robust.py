@@ -0,0 +1,157 @@
+import numpy as np
+
+from core.lstsq import LeastSquares
+
+# Median of the radial residual |(e_x, e_y)| for isotropic Gaussian errors, in sigmas.
+RAYLEIGH_MEDIAN = np.sqrt(2.0 * np.log(2.0))
+
+
+def huber_weights(u, k=1.345):
+    """Huber weights: 1 inside |u| <= k, k / |u| outside."""
+    u = np.abs(u)
+    return np.where(u <= k, 1.0, k / np.maximum(u, k))
+
+
+def tukey_weights(u, c=4.685):
+    """Tukey biweight: (1 - (u / c)^2)^2 inside |u| < c, 0 outside."""
+    t = np.minimum(np.abs(u) / c, 1.0)
+    return (1.0 - t * t) ** 2
+
+
+ROBUST_WEIGHTS = {
+    "huber": huber_weights,
+    "tukey": tukey_weights,
+}
+
+
+def radial_residuals(A, coeffs, targets, scale):
+    """
+    Length of the (2D) residual of every observation, in the units of `scale`.
+    """
+    return np.linalg.norm((targets - A @ coeffs) * scale, axis=-1)
+
+
+def robust_sigma(residuals):
+    """
+    Noise level from the median radial residual, robust to up to 50 % outliers.
+    """
+    return float(np.median(residuals)) / RAYLEIGH_MEDIAN
+
+
+def irls(A, targets, scale=1.0, weights="huber", tuning=None, max_iterations=50, tol=1e-8):
+    """
+    Iteratively reweighted least squares with Huber or Tukey weights on the radial
+    residuals, standardized by their robust sigma. Every iteration is one factorization
+    of the weighted design matrix, shared by both target columns.
+
+    :param A: (N, T) design matrix
+    :param targets: (N, 2) targets
+    :param scale: Per-column factor converting residuals to common units
+    :param weights: "huber" or "tukey"
+    :param tuning: Tuning constant (defaults 1.345 for Huber, 4.685 for Tukey)
+    :param max_iterations: Iteration budget
+    :param tol: Relative coefficient change at which the iteration stops early
+    :return: (coeffs (T, 2), weights (N,), iterations)
+    """
+    if weights not in ROBUST_WEIGHTS:
+        raise ValueError(f"Unknown robust weights '{weights}'; expected one of {tuple(ROBUST_WEIGHTS)}.")
+    weight_fn = ROBUST_WEIGHTS[weights]
+    tuning = {} if tuning is None else {"huber": {"k": tuning}, "tukey": {"c": tuning}}[weights]
+
+    coeffs = LeastSquares(A).solve(targets)
+    w = np.ones(len(A))
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        residuals = radial_residuals(A, coeffs, targets, scale)
+        sigma = robust_sigma(residuals)
+        if sigma <= 0:
+            break
+        w = weight_fn(residuals / sigma, **tuning)
+        root_w = np.sqrt(w)[:, None]
+        updated = LeastSquares(A * root_w).solve(targets * root_w)
+        change = np.abs(updated - coeffs).max()
+        coeffs = updated
+        if change <= tol * (1.0 + np.abs(coeffs).max()):
+            break
+    return coeffs, w, iteration
+
+
+def ransac(A, targets, scale=1.0, threshold=None, max_iterations=1000, batch_size=128,
+           confidence=0.99, seed=None):
+    """
+    RANSAC over minimal samples of T observations, scored in batches: one stacked
+    (batch, T, T) solve for all hypotheses and one (N, T) x (T, 2 * batch) product for
+    all their residuals. The number of hypotheses adapts to the best inlier ratio found
+    so far (stopping once `confidence` is reached) within `max_iterations`.
+
+    :param A: (N, T) design matrix
+    :param targets: (N, 2) targets
+    :param scale: Per-column factor converting residuals to common units
+    :param threshold: Inlier distance in those units; defaults to 3 robust sigmas of the
+                      least-squares residuals
+    :param max_iterations: Hypothesis budget
+    :param batch_size: Hypotheses scored per batch
+    :param confidence: Probability of having drawn one all-inlier sample before stopping
+    :param seed: Random seed
+    :return: (coeffs (T, 2) refitted on the inliers, inlier mask (N,) as float weights,
+              hypotheses evaluated)
+    """
+    n, terms = A.shape
+    fit = LeastSquares(A)
+    if n <= terms:
+        return fit.solve(targets), np.ones(n), 0
+
+    if threshold is None:
+        threshold = 3.0 * robust_sigma(radial_residuals(A, fit.solve(targets), targets, scale))
+    rng = np.random.default_rng(seed)
+    scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), (targets.shape[1],))
+
+    best_count = 0
+    best_error = np.inf
+    best_mask = np.ones(n, dtype=bool)
+    needed = max_iterations
+    evaluated = 0
+    while evaluated < min(needed, max_iterations):
+        batch = min(batch_size, max_iterations - evaluated)
+        samples = np.argpartition(rng.random((batch, n)), terms - 1, axis=1)[:, :terms]
+        try:
+            coeffs = np.linalg.solve(A[samples], targets[samples])
+        except np.linalg.LinAlgError:
+            # A degenerate sample in the batch; the pseudo-inverse handles it
+            coeffs = np.linalg.pinv(A[samples]) @ targets[samples]
+
+        predicted = A @ coeffs.transpose(1, 0, 2).reshape(terms, -1)
+        errors = np.linalg.norm(
+            (predicted.reshape(n, batch, -1) - targets[:, None, :]) * scale, axis=2
+        )
+        inliers = errors <= threshold
+        counts = inliers.sum(axis=0)
+        inlier_error = np.where(inliers, errors, 0.0).sum(axis=0)
+        # Most inliers wins; ties go to the smaller inlier error
+        order = np.lexsort((inlier_error, -counts))
+        best = order[0]
+        if (counts[best], -inlier_error[best]) > (best_count, -best_error):
+            best_count, best_error = int(counts[best]), float(inlier_error[best])
+            best_mask = inliers[:, best]
+            ratio = best_count / n
+            if ratio >= 1.0:
+                needed = 0
+            elif best_count >= terms:
+                # log1p keeps tiny all-inlier probabilities from rounding the log to zero
+                denominator = np.log1p(-ratio ** terms)
+                if denominator < 0 and np.isfinite(denominator):
+                    needed = int(min(np.ceil(np.log(1.0 - confidence) / denominator), max_iterations))
+                else:
+                    needed = max_iterations
+        evaluated += batch
+
+    if best_mask.sum() < terms:
+        return fit.solve(targets), np.ones(n), evaluated
+
+    # Refit on the consensus set, then take the inliers of the refitted model once more
+    coeffs = LeastSquares(A[best_mask]).solve(targets[best_mask])
+    refined = radial_residuals(A, coeffs, targets, scale) <= threshold
+    if refined.sum() >= terms and not np.array_equal(refined, best_mask):
+        best_mask = refined
+        coeffs = LeastSquares(A[best_mask]).solve(targets[best_mask])
+    return coeffs, best_mask.astype(np.float64), evaluated
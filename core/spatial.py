@@ -0,0 +1,210 @@
+import numpy as np
+
+# Target size of one row block of a distance matrix, in bytes (about L2-cache sized).
+DISTANCE_BLOCK_BYTES = 1 << 20
+
+
+def _block_rows(num_cols, block_rows=None):
+    if block_rows is None:
+        block_rows = DISTANCE_BLOCK_BYTES // (8 * max(num_cols, 1))
+    return max(int(block_rows), 1)
+
+
+def _distance_block(src, dest, p, out, work):
+    """
+    Distances from every row of `src` to every row of `dest`, written into `out`.
+    One coordinate axis at a time, so the only temporary is the `work` buffer.
+    """
+    for axis in range(src.shape[1]):
+        diff = out if axis == 0 else work
+        np.subtract.outer(src[:, axis], dest[:, axis], out=diff)
+        if p == 2:
+            np.square(diff, out=diff)
+        else:
+            np.abs(diff, out=diff)
+        if axis > 0:
+            if p == np.inf:
+                np.maximum(out, diff, out=out)
+            else:
+                np.add(out, diff, out=out)
+    if p == 2:
+        np.sqrt(out, out=out)
+    return out
+
+
+def _check_norm(p):
+    if p not in (1, 2, np.inf):
+        raise ValueError(f"Unsupported norm order {p}; expected 1, 2 or inf.")
+
+
+def distance_matrix(src, dest, p=2, out=None, block_rows=None):
+    """
+    Pairwise Minkowski distances, computed in cache-sized row blocks without the
+    (N, M, D) difference tensor of broadcasting.
+
+    :param src: (N, D) points
+    :param dest: (M, D) points
+    :param p: Norm order: 1, 2 or np.inf
+    :param out: Optional preallocated (N, M) float64 output
+    :param block_rows: Rows per block; defaults to about DISTANCE_BLOCK_BYTES per block
+    :return: (N, M) distance matrix (`out` when given)
+    """
+    _check_norm(p)
+    src = np.asarray(src, dtype=np.float64)
+    dest = np.asarray(dest, dtype=np.float64)
+    if out is None:
+        out = np.empty((len(src), len(dest)))
+    elif out.shape != (len(src), len(dest)) or out.dtype != np.float64:
+        raise ValueError(f"out must be a float64 array of shape {(len(src), len(dest))}.")
+
+    rows = _block_rows(len(dest), block_rows)
+    work = np.empty((min(rows, len(src)), len(dest)))
+    for start in range(0, len(src), rows):
+        block = out[start:start + rows]
+        _distance_block(src[start:start + rows], dest, p, block, work[:len(block)])
+    return out
+
+
+def iter_distance_blocks(src, dest, p=2, block_rows=None):
+    """
+    Stream the distance matrix of `src` x `dest` as row blocks, for consumers such as
+    `block @ coeffs` that never need the full matrix.
+    Yields (start_row, block); `block` is a reused buffer, overwritten by the next block.
+    """
+    _check_norm(p)
+    src = np.asarray(src, dtype=np.float64)
+    dest = np.asarray(dest, dtype=np.float64)
+    rows = _block_rows(len(dest), block_rows)
+    out = np.empty((min(rows, len(src)), len(dest)))
+    work = np.empty_like(out)
+    for start in range(0, len(src), rows):
+        count = min(rows, len(src) - start)
+        yield start, _distance_block(src[start:start + count], dest, p, out[:count], work[:count])
+
+
+def quadrant_of(points, queries):
+    """
+    Quadrant code of each point relative to its query, using the LDW convention:
+    0 = x >= qx, y >= qy (top-right), 1 = x < qx, y >= qy (top-left),
+    2 = x < qx, y < qy (bottom-left), 3 = x >= qx, y < qy (bottom-right).
+
+    :param points: (..., 2) point coordinates
+    :param queries: (..., 2) query coordinates, broadcastable against `points`
+    :return: Integer array of quadrant codes with the broadcast shape
+    """
+    right = points[..., 0] >= queries[..., 0]
+    up = points[..., 1] >= queries[..., 1]
+    return np.where(up, np.where(right, 0, 1), np.where(right, 3, 2))
+
+
+class QuadrantIndex:
+    """
+    Spatial index over 2D points for the LDW neighbour search.
+    It is built once over the GCP coordinates (a KD-tree from scipy) and answers
+    k-nearest and quadrant-constrained k-nearest queries for a whole batch of query
+    points at once, instead of a distance scan and Python bucketing per query.
+    """
+
+    def __init__(self, points, leafsize=16):
+        """
+        :param points: (N, 2) indexed coordinates
+        :param leafsize: KD-tree leaf size
+        """
+        from scipy.spatial import cKDTree
+
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        self.tree = cKDTree(self.points, leafsize=leafsize)
+
+        # Dominance tables: with the points sorted by x, the running min/max of y on
+        # either side of a query's x tell whether a quadrant holds any point at all.
+        order = np.argsort(self.points[:, 0], kind="stable")
+        self._sorted_x = self.points[order, 0]
+        sorted_y = self.points[order, 1]
+        self._prefix_max_y = np.maximum.accumulate(sorted_y)
+        self._prefix_min_y = np.minimum.accumulate(sorted_y)
+        self._suffix_max_y = np.maximum.accumulate(sorted_y[::-1])[::-1]
+        self._suffix_min_y = np.minimum.accumulate(sorted_y[::-1])[::-1]
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, queries, k, p=2):
+        """
+        The k nearest points of every query, closest first.
+
+        :param queries: (M, 2) query coordinates
+        :param k: Number of neighbours (clipped to the number of indexed points)
+        :param p: Minkowski norm order (1, 2, np.inf, ...)
+        :return: (distances, indices), both (M, min(k, N))
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        k = min(int(k), len(self))
+        dist, idx = self.tree.query(queries, k=k, p=p, workers=-1)
+        return dist.reshape(len(queries), k), idx.reshape(len(queries), k)
+
+    def occupied_quadrants(self, queries):
+        """
+        Which of the four quadrants around each query contain at least one point.
+
+        :param queries: (M, 2) query coordinates
+        :return: (M, 4) boolean array, columns in quadrant-code order
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        qx, qy = queries[:, 0], queries[:, 1]
+        n = len(self)
+        # Points [0, split) have x < qx, points [split, n) have x >= qx
+        split = np.searchsorted(self._sorted_x, qx, side="left")
+        has_left = split > 0
+        has_right = split < n
+        left = np.maximum(split - 1, 0)
+        right = np.minimum(split, n - 1)
+
+        occupied = np.empty((len(queries), 4), dtype=bool)
+        occupied[:, 0] = has_right & (self._suffix_max_y[right] >= qy)
+        occupied[:, 1] = has_left & (self._prefix_max_y[left] >= qy)
+        occupied[:, 2] = has_left & (self._prefix_min_y[left] < qy)
+        occupied[:, 3] = has_right & (self._suffix_min_y[right] < qy)
+        return occupied
+
+    def quadrant_nearest(self, queries, k=1, p=2):
+        """
+        The k nearest points in each of the four quadrants around every query.
+        The search starts from the 16k nearest neighbours, which settles most queries, and
+        doubles the neighbour count only for the queries that still miss points in an
+        occupied quadrant.
+
+        :param queries: (M, 2) query coordinates
+        :param k: Neighbours wanted per quadrant
+        :param p: Minkowski norm order
+        :return: (distances, indices), both (M, 4, k); a slot without a point holds
+                 distance inf and index -1
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        m, n = len(queries), len(self)
+        dist_out = np.full((m, 4, k), np.inf)
+        idx_out = np.full((m, 4, k), -1, dtype=np.intp)
+        if n == 0 or m == 0:
+            return dist_out, idx_out
+
+        occupied = self.occupied_quadrants(queries)
+        active = np.arange(m)
+        kq = min(16 * k, n)
+        while active.size:
+            dist, idx = self.nearest(queries[active], kq, p=p)
+            quad = quadrant_of(self.points[idx], queries[active, None, :])
+            found = np.empty((len(active), 4), dtype=np.intp)
+            for q in range(4):
+                hit = quad == q
+                # Neighbours come closest first, so the running count is the rank
+                rank = np.cumsum(hit, axis=1) - 1
+                rows, cols = np.nonzero(hit & (rank < k))
+                dist_out[active[rows], q, rank[rows, cols]] = dist[rows, cols]
+                idx_out[active[rows], q, rank[rows, cols]] = idx[rows, cols]
+                found[:, q] = hit.sum(axis=1)
+
+            if kq >= n:
+                break
+            done = np.all((found >= k) | ~occupied[active], axis=1)
+            active = active[~done]
+            kq = min(2 * kq, n)
+        return dist_out, idx_out
@@ -0,0 +1,140 @@
+import numpy as np
+
+
+class WarpGrid:
+    """
+    Approximate ground -> image mapping for a regular output raster.
+    The exact transform is evaluated only on a coarse grid of nodes every `spacing`
+    output pixels, and image coordinates in between are interpolated separably
+    (bilinear for `order=1`, Catmull-Rom bicubic for `order=3`).
+    """
+
+    def __init__(self, transform, x0, y0, step, out_h, out_w, spacing=16, order=1):
+        """
+        :param transform: Callable mapping an (N, 2) array of ground points to (img_x, img_y)
+        :param x0, y0: Ground coordinates of output pixel (0, 0)
+        :param step: Ground sampling distance; columns increase X, rows decrease Y
+        :param out_h, out_w: Output raster size in pixels
+        :param spacing: Distance between grid nodes in output pixels
+        :param order: 1 for bilinear, 3 for bicubic interpolation between nodes
+        """
+        if order not in (1, 3):
+            raise ValueError("WarpGrid order must be 1 (bilinear) or 3 (bicubic).")
+
+        self.transform = transform
+        self.x0, self.y0, self.step = float(x0), float(y0), float(step)
+        self.out_h, self.out_w = out_h, out_w
+        self.spacing = spacing
+        self.order = order
+        self.pad = 0 if order == 1 else 1
+        self.max_error = None
+
+        node_rows = self._node_positions(out_h)
+        node_cols = self._node_positions(out_w)
+        self.nodes_x, self.nodes_y = self.evaluate_exact(node_rows, node_cols)
+
+    @classmethod
+    def fit(cls, transform, x0, y0, step, out_h, out_w, spacing=16, order=1, tolerance=0.1):
+        """
+        Build a grid whose interpolation error stays below `tolerance` image pixels.
+        The spacing is halved until the error measured at the cell centres is within
+        tolerance. Returns None when only per-pixel evaluation would satisfy it.
+        """
+        while spacing >= 2:
+            grid = cls(transform, x0, y0, step, out_h, out_w, spacing, order)
+            grid.max_error = grid.measure_error()
+            print(f"Warp grid spacing {spacing}px: max interpolation error "
+                  f"{grid.max_error:.4f}px (tolerance {tolerance}px)")
+            if grid.max_error <= tolerance:
+                return grid
+            spacing //= 2
+        return None
+
+    def _node_positions(self, length):
+        num_nodes = (length - 1) // self.spacing + 2 + 2 * self.pad
+        return (np.arange(num_nodes) - self.pad) * float(self.spacing)
+
+    def evaluate_exact(self, rows, cols, block_rows=256):
+        """
+        Evaluate the exact transform on the mesh of output (possibly fractional) pixel
+        positions `rows` x `cols`, a few rows at a time to bound memory.
+        """
+        ground_x = self.x0 + np.asarray(cols, dtype=np.float64) * self.step
+        ground_y = self.y0 - np.asarray(rows, dtype=np.float64) * self.step
+
+        img_x = np.empty((len(rows), len(cols)))
+        img_y = np.empty((len(rows), len(cols)))
+        for start in range(0, len(rows), block_rows):
+            block = ground_y[start:start + block_rows]
+            points = np.column_stack((np.tile(ground_x, len(block)), np.repeat(block, len(cols))))
+            block_x, block_y = self.transform(points)
+            img_x[start:start + len(block)] = np.reshape(block_x, (len(block), len(cols)))
+            img_y[start:start + len(block)] = np.reshape(block_y, (len(block), len(cols)))
+        return img_x, img_y
+
+    def _taps(self, positions):
+        """
+        Node indices (n, k) and weights (n, k) for interpolating at output positions.
+        """
+        t = np.asarray(positions, dtype=np.float64) / self.spacing
+        base = np.floor(t).astype(np.int64)
+        f = t - base
+        base += self.pad
+
+        if self.order == 1:
+            index = np.stack((base, base + 1), axis=1)
+            weights = np.stack((1.0 - f, f), axis=1)
+        else:
+            f2, f3 = f * f, f * f * f
+            index = np.stack((base - 1, base, base + 1, base + 2), axis=1)
+            weights = np.stack((
+                0.5 * (-f3 + 2.0 * f2 - f),
+                0.5 * (3.0 * f3 - 5.0 * f2 + 2.0),
+                0.5 * (-3.0 * f3 + 4.0 * f2 + f),
+                0.5 * (f3 - f2),
+            ), axis=1)
+        return index, weights
+
+    def interpolate(self, rows, cols):
+        """
+        Interpolated image coordinates on the mesh `rows` x `cols` of output pixel
+        positions, done separably: first along rows on the coarse columns, then along
+        columns. Returns (img_x, img_y), each of shape (len(rows), len(cols)).
+        """
+        row_index, row_weights = self._taps(rows)
+        col_index, col_weights = self._taps(cols)
+        node_cols = slice(col_index.min(), col_index.max() + 1)
+        col_index = col_index - node_cols.start
+
+        result = []
+        for nodes in (self.nodes_x, self.nodes_y):
+            nodes = nodes[:, node_cols]
+            along_rows = np.einsum("rk,rkc->rc", row_weights, nodes[row_index])
+            result.append(np.einsum("ck,rck->rc", col_weights, along_rows[:, col_index]))
+        return result[0], result[1]
+
+    def interpolate_tile(self, start_row, end_row, start_col, end_col):
+        """
+        Interpolated image coordinates for the output tile [start_row:end_row, start_col:end_col].
+        """
+        return self.interpolate(np.arange(start_row, end_row), np.arange(start_col, end_col))
+
+    def measure_error(self, block_rows=256):
+        """
+        Maximum distance in image pixels between the interpolated and exact mapping,
+        checked at the centres of the grid cells where interpolation error peaks.
+        """
+        half = self.spacing / 2.0
+        rows = np.arange(half, self.out_h - 1, self.spacing)
+        cols = np.arange(half, self.out_w - 1, self.spacing)
+        if len(rows) == 0 or len(cols) == 0:
+            return 0.0
+
+        max_error = 0.0
+        for start in range(0, len(rows), block_rows):
+            block = rows[start:start + block_rows]
+            exact_x, exact_y = self.evaluate_exact(block, cols)
+            approx_x, approx_y = self.interpolate(block, cols)
+            error = np.sqrt((approx_x - exact_x) ** 2 + (approx_y - exact_y) ** 2).max()
+            max_error = max(max_error, float(error))
+        return max_error
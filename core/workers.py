@@ -0,0 +1,137 @@
+import contextlib
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot
+
+from core.cache import resampling_key
+from core.degree_sweep import DegreeSweep
+from core.parallel import default_workers
+from core.resampling import Resampling, mapping_options
+
+
+class ResamplingWorker(QObject):
+    finished = Signal()           
+    progress = Signal(float)
+    error = Signal(str)         
+    resampled = Signal(np.ndarray)
+
+    def __init__(self, image, gcp_points, icp_points, step, degree,
+                 output_path="resampled_grid.npy", tile_size=1024,
+                 workers=None, executor="thread", cache=None, **mapping):
+        """
+        `mapping` are the mapping options of `Resampling.resample` (see `MAPPING_DEFAULTS`).
+        With a `ResamplingCache` as `cache`, a product computed before for the same model,
+        image and settings is loaded from it instead; new products are written into the
+        cache (under their key, not `output_path`).
+        """
+        super().__init__()
+        self.image = image
+        self.gcp_points = gcp_points
+        self.icp_points = icp_points
+        self.step = step
+        self.degree = degree
+        self.output_path = output_path
+        self.tile_size = tile_size
+        self.workers = default_workers() if workers is None else workers
+        self.executor = executor
+        self.mapping = mapping_options(**mapping)
+        self.cache = cache
+        self._is_cancelled = False 
+
+    @Slot()
+    def run(self):
+        """
+        Perform the resampling in the background using backward parameters.
+        """
+        try:
+            resampling = Resampling(
+                image=self.image,
+                gcp_points=self.gcp_points,
+                icp_points=self.icp_points,
+                degree=self.degree
+            )
+
+            if self.cache is None:
+                grd_image = self._resample(resampling, self.output_path)
+            else:
+                key = resampling_key(resampling, self.step, **self.mapping)
+                grd_image = self.cache.get(key)
+                if grd_image is None:
+                    # Another window may be computing the same product; wait for it
+                    with self.cache.lock(key, cancel_flag=lambda: self._is_cancelled) as locked:
+                        grd_image = self.cache.get(key) if locked else None
+                        if locked and grd_image is None:
+                            grd_image = self._resample(resampling, self.cache.partial_path(key))
+                            if resampling.completed:
+                                grd_image = self.cache.commit(key)
+                else:
+                    print(f"Resampled product found in the cache: {self.cache.product_path(key)}")
+                    self.progress.emit(100.0)
+
+            if not self._is_cancelled and grd_image is not None:
+                self.resampled.emit(grd_image)
+
+            self.finished.emit()
+
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def _resample(self, resampling, output_path):
+        return resampling.resample(
+            step=self.step,
+            progress_callback=self.progress.emit,
+            cancel_flag=lambda: self._is_cancelled,
+            tile_size=self.tile_size,
+            output_path=output_path,
+            workers=self.workers,
+            executor=self.executor,
+            **self.mapping
+        )
+
+    def cancel(self):
+        """
+        Set the cancellation flag to stop the resampling process.
+        """
+        self._is_cancelled = True
+
+
+class DegreeSweepWorker(QObject):
+    finished = Signal()
+    progress = Signal(float)
+    error = Signal(str)
+    swept = Signal(list)
+
+    def __init__(self, gcp_points, icp_points, max_degree=5, criterion="bic", forward=True):
+        super().__init__()
+        self.gcp_points = gcp_points
+        self.icp_points = icp_points
+        self.max_degree = max_degree
+        self.criterion = criterion
+        self.forward = forward
+        self._is_cancelled = False
+
+    @Slot()
+    def run(self):
+        """
+        Run the degree sweep in the background and emit the ranked results.
+        """
+        try:
+            sweep = DegreeSweep(self.gcp_points, self.icp_points, forward=self.forward)
+            results = sweep.run(
+                max_degree=self.max_degree,
+                criterion=self.criterion,
+                progress_callback=self.progress.emit,
+                cancel_flag=lambda: self._is_cancelled
+            )
+            if not self._is_cancelled:
+                self.swept.emit(results)
+            self.finished.emit()
+
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def cancel(self):
+        """
+        Set the cancellation flag to stop the sweep after the current degree.
+        """
+        self._is_cancelled = True
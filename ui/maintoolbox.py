@@ -5,22 +5,23 @@ from PySide6.QtWidgets import (QSlider, QInputDialog,
     QGraphicsLineItem, QMessageBox, QDialog, QProgressDialog,
     QMainWindow, QPushButton, QLabel, QWidget, QVBoxLayout, 
     QHBoxLayout, QFileDialog, QGraphicsScene, 
-    QGraphicsPixmapItem, QTableWidget, QTableWidgetItem, QHeaderView,
-    QCheckBox, QScrollArea, QSpacerItem, QSizePolicy, QRadioButton
+    QGraphicsPixmapItem, QTableView, QHeaderView,
+    QScrollArea, QSpacerItem, QSizePolicy, QRadioButton
 )
 from PySide6.QtCore import QThread
 from PySide6.QtGui import QImage, QPixmap
 from ui.widgets.circular import CircleNumberWidget
 from ui.magnifier import MagnifierGraphicsView
 from core.polynomial import Polynomial
-from core.resampling import ResamplingWorker
+from core.workers import DegreeSweepWorker, ResamplingWorker
 from core.pointwise import Pointwise
 import numpy as np 
-import matplotlib.pyplot as plt
 from core.project import Project
-from core.ga_runner import GARunner
-from core.piecewise import SplitLineWindow
+from core.points import PointSet, load_point_file
+from core.ga_runner import GARunner, load_ga_extension
 from ui.hover_button import HoverButton
+from ui.point_table_model import PointTableModel
+from ui.point_layer import PointLayerItem
 
 class ToolBoxMainWindow(QMainWindow):
     def __init__(self):
@@ -56,12 +57,14 @@ class ToolBoxMainWindow(QMainWindow):
         self.table_scroll_area.setFixedHeight(300)
         self.table_scroll_area.setWidgetResizable(True)
 
-        self.table_widget = QTableWidget()
-        self.table_widget.setRowCount(0)
-        self.table_widget.setColumnCount(7)
-        self.table_widget.setHorizontalHeaderLabels(["Idx", "x", "y", "X", "Y", "Z", "ICP"])
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table_scroll_area.setWidget(self.table_widget)
+        self.point_model = PointTableModel()
+        self.point_model.icpChanged.connect(self.update_icon)
+        self.point_layer = None
+
+        self.table_view = QTableView()
+        self.table_view.setModel(self.point_model)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_scroll_area.setWidget(self.table_view)
 
         self.table_scroll_area.setVisible(False)
         image_layout.addWidget(self.table_scroll_area)
@@ -172,8 +175,24 @@ class ToolBoxMainWindow(QMainWindow):
         self.close_button.clicked.connect(self.close)
         last_layout.addWidget(self.close_button)
         
+        self.degree_sweep_button = QPushButton("AUTO", self)
+        self.degree_sweep_button.setToolTip("Select the polynomial degree automatically.")
+        self.degree_sweep_button.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                color: white;
+                border: none;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                color: #5a5;
+            }
+        """)
+        self.degree_sweep_button.clicked.connect(self.perform_degree_sweep)
+
         self.right_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
         self.right_layout.addWidget(circle_widget)
+        self.right_layout.addWidget(self.degree_sweep_button)
         self.main_layout.addLayout(self.right_layout)
         self.main_layout.addLayout(last_layout)
         
@@ -185,6 +204,9 @@ class ToolBoxMainWindow(QMainWindow):
         """
         Opens the GA parameter dialog, then runs GA if confirmed.
         """
+        if load_ga_extension() is None:
+            QMessageBox.warning(self, "Warning", "The GA extension is not built. See thirdparty/GA/readme.md.")
+            return
         if self.ga_runner.open_parameter_dialog():
             self.ga_runner.run_ga()
 
@@ -208,18 +230,29 @@ class ToolBoxMainWindow(QMainWindow):
         if not ok:
             return
 
+        corrections = {"None": None, "MQ (Multiquadratic)": "MQ",
+                       "CSRBF (Compactly Supported RBF)": "CSRBF", "LDW (Local Distance Weighted)": "LDW"}
+        correction, ok = QInputDialog.getItem(
+            self, "Input", "Pointwise correction of the GCP residuals:", list(corrections), 0, False
+        )
+        if not ok:
+            return
+
         # Create a progress dialog
         self.progress_dialog = QProgressDialog("Resampling in progress...", "", 0, 100, self)
         self.progress_dialog.setWindowModality(Qt.WindowModal)
         self.progress_dialog.show()
 
-        # Create the worker and thread
+        # Create the worker and thread. The worker opens the image itself, so only the
+        # windows it needs are read (memory-mapped for .npy and raw rasters).
         self.resampling_worker = ResamplingWorker(
-            image=self.image,
+            image=self.image_path,
             gcp_points=gcp_points,
             icp_points=self.get_icp_points(),
             step=step,
-            degree=self.degree_slider.value()
+            degree=self.degree_slider.value(),
+            correction=corrections[correction],
+            cache=self.project.resampling_cache()
         )
         self.resampling_thread = QThread()
 
@@ -322,6 +355,7 @@ class ToolBoxMainWindow(QMainWindow):
     def open_image_with_path(self, image_path):
         pixmap = QPixmap(image_path)
         self.image_scene.clear()
+        self.point_layer = None
         self.image_viewer.set_pixmap(pixmap)
 
         pixmap_item = QGraphicsPixmapItem(pixmap)
@@ -345,37 +379,14 @@ class ToolBoxMainWindow(QMainWindow):
             self.read_file_path(file_path)
             
     def read_file_path(self, file_path):
-        with open(file_path, "r") as file:
-            lines = file.readlines()
-            self.table_widget.setRowCount(len(lines))
-            for row, line in enumerate(lines):
-                values = line.strip().split()
-                for col, value in enumerate(values):
-                    self.table_widget.setItem(row, col, QTableWidgetItem(value))
-                
-                # Add ICP checkbox in the last column (checked by default)
-                checkbox = QCheckBox()
-                checkbox.setChecked(True)  # Mark as ICP by default
-                checkbox.setStyleSheet("margin-left: 50%; margin-right: 50%;")
-                checkbox.stateChanged.connect(lambda state, row=row: self.update_icon(row, state))
-                self.table_widget.setCellWidget(row, 6, checkbox)
-
-                # Draw scaled icons on the image
-                if len(values) >= 3:  # Ensure there are at least x, y coordinates
-                    x, y = int(float(values[1])), int(float(values[2]))
-                    idx = values[0]
-
-                    icon_path = "ui/icon/redpin.png"  # Replace with the path to your icon
-                    icon_pixmap = QPixmap(icon_path)
-                    scaled_pixmap = icon_pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)  # Resize to 20x20
-                    icon_item = self.image_scene.addPixmap(scaled_pixmap)
-                    icon_item.setOffset(x - scaled_pixmap.width() // 2, y - scaled_pixmap.height() // 2)
-
-                    label = QLabel(idx)
-                    label.setStyleSheet("color: red; font-size: 10px;")
-                    label.setAttribute(Qt.WA_TranslucentBackground)
-                    proxy_label = self.image_scene.addWidget(label)
-                    proxy_label.setPos(x + 5, y - 5)
+        points = load_point_file(file_path)
+        self.point_model.set_points(points)
+
+        # One painted layer for all pins instead of a pixmap item and label per point
+        if self.point_layer is not None:
+            self.image_scene.removeItem(self.point_layer)
+        self.point_layer = PointLayerItem(points)
+        self.image_scene.addItem(self.point_layer)
 
         self.table_scroll_area.setVisible(True)
         self.toggle_table_button.setVisible(True)
@@ -385,34 +396,18 @@ class ToolBoxMainWindow(QMainWindow):
         """
         Finds the nearest ICP point to the clicked position and converts it to GCP.
         """
-        icp_points = self.get_icp_points()
-        if not icp_points:
+        points = self.get_points()
+        icp_rows = np.flatnonzero(points.icp)
+        if len(icp_rows) == 0:
             QMessageBox.warning(self, "Warning", "No ICP points available.")
             return
 
-        nearest_point = None
-        min_distance = float('inf')
-        nearest_row = None
-
-        for row in range(self.table_widget.rowCount()):
-            checkbox = self.table_widget.cellWidget(row, 6)
-            if checkbox and checkbox.isChecked():   
-                x = float(self.table_widget.item(row, 1).text())
-                y = float(self.table_widget.item(row, 2).text())
-                distance = np.sqrt((x - scene_pos.x())**2 + (y - scene_pos.y())**2)
-                if distance < min_distance:
-                    min_distance = distance
-                    nearest_point = (x, y)
-                    nearest_row = row
-
-        if nearest_point is None:
-            QMessageBox.warning(self, "Warning", "No ICP points found near the clicked position.")
-            return
-
-        checkbox = self.table_widget.cellWidget(nearest_row, 6)
-        checkbox.setChecked(False) 
+        distance = np.hypot(points.x[icp_rows] - scene_pos.x(), points.y[icp_rows] - scene_pos.y())
+        nearest_row = int(icp_rows[np.argmin(distance)])
+        nearest_point = (points.x[nearest_row], points.y[nearest_row])
 
-        self.update_icon(nearest_row, Qt.Unchecked)
+        # Flipping the flag in the model refreshes the table and, via icpChanged, the pin
+        self.point_model.set_icp(nearest_row, False)
 
         QMessageBox.information(
             self, "Info",
@@ -420,81 +415,33 @@ class ToolBoxMainWindow(QMainWindow):
         )
 
 
-    def update_icon(self, row, state):
+    def update_icon(self, row, is_icp):
         """
-        Updates the icon of the point based on the checkbox state.
+        Repaints the pin of a point after its ICP flag changed (red = ICP, blue = GCP).
         """
-        if (state == Qt.Unchecked or state == 0):
-            icon_path = "ui/icon/bluepin.png"   
-        else:
-            icon_path = "ui/icon/redpin.png"   
-
-        # Get the x, y coordinates from the table
-        x = float(self.table_widget.item(row, 1).text())
-        y = float(self.table_widget.item(row, 2).text())
-
-        # Load the new icon pixmap
-        icon_pixmap = QPixmap(icon_path)
-        if icon_pixmap.isNull():
-            print(f"Failed to load icon from path: {icon_path}")
+        if self.point_layer is None:
             return
+        self.point_layer.refresh()
 
-        # Scale the icon pixmap
-        scaled_pixmap = icon_pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-
-        # Find and update the corresponding icon in the scene
-        for item in self.image_scene.items():
-            if isinstance(item, QGraphicsPixmapItem):
-                # Calculate the item's center position
-                item_center_x = item.offset().x() + item.pixmap().width() // 2
-                item_center_y = item.offset().y() + item.pixmap().height() // 2
-
-                # Check if the item's position matches the target coordinates
-                if abs(item_center_x - x) < 1 and abs(item_center_y - y) < 1:
-                    # Update the pixmap of the item
-                    item.setPixmap(scaled_pixmap)
-                    break  # Stop searching once the correct item is updated
-
-        # Force the scene to update
-        self.image_scene.update()
 
+    def get_points(self):
+        """
+        All points shown in the table as a PointSet.
+        Rows with the ICP box checked are flagged as ICPs.
+        """
+        return self.point_model.points
 
     def get_gcp_points(self):
         """
-        Extract GCP points from the table (unchecked rows).
-        Returns a list of dictionaries with 'x', 'y', 'X', 'Y', and 'Z' for each GCP.
+        Extract GCP points from the table (unchecked rows) as a PointSet.
         """
-        gcp_points = []
-        for row in range(self.table_widget.rowCount()):
-            checkbox = self.table_widget.cellWidget(row, 6)
-            if checkbox and not checkbox.isChecked():  # Unchecked rows
-                point = {
-                    "x": float(self.table_widget.item(row, 1).text()),
-                    "y": float(self.table_widget.item(row, 2).text()),
-                    "X": float(self.table_widget.item(row, 3).text()),
-                    "Y": float(self.table_widget.item(row, 4).text()),
-                    "Z": float(self.table_widget.item(row, 5).text()),
-                }
-                gcp_points.append(point)
-        return gcp_points
+        return self.get_points().gcps()
 
     def get_icp_points(self):
         """
-        Extract ICP points from the table (checked rows).
-        Returns a list of dictionaries with 'x', 'y', 'X', 'Y'.
+        Extract ICP points from the table (checked rows) as a PointSet.
         """
-        icp_points = []
-        for row in range(self.table_widget.rowCount()):
-            checkbox = self.table_widget.cellWidget(row, 6)
-            if checkbox and checkbox.isChecked(): 
-                point = {
-                    "x": float(self.table_widget.item(row, 1).text()),
-                    "y": float(self.table_widget.item(row, 2).text()),
-                    "X": float(self.table_widget.item(row, 3).text()),
-                    "Y": float(self.table_widget.item(row, 4).text()),
-                }
-                icp_points.append(point)
-        return icp_points
+        return self.get_points().icps()
 
 
     def perform_regression(self):
@@ -502,13 +449,14 @@ class ToolBoxMainWindow(QMainWindow):
         Evaluate the polynomial regression on ICP points, calculate RMSE,
         and display quiver plots for forward and backward transformations side by side.
         """
-        icp_points = self.get_icp_points()  # Extract ICP points
+        points = self.get_points()
+        icp_points = points.icps()  # Extract ICP points
         if not icp_points:
             QMessageBox.warning(self, "Warning", "No ICP points available.")
             return
 
         degree = self.degree_slider.value()
-        gcp_points = self.get_gcp_points()
+        gcp_points = points.gcps()
         if not gcp_points:
             QMessageBox.warning(self, "Warning", "No GCP points for regression.")
             return
@@ -531,16 +479,24 @@ class ToolBoxMainWindow(QMainWindow):
         self.project.degree = degree
         self.project.set_predicted(predicted_x_backward, predicted_x_forward, predicted_y_backward, predicted_y_forward)
 
-        actual_x = np.array([point['x'] for point in icp_points])
-        actual_y = np.array([point['y'] for point in icp_points])
+        actual_x, actual_y = icp_points.x, icp_points.y
         rmse_X_forward, rmse_Y_forward = polynomial.rmse(predicted_x_forward, predicted_y_forward, actual_x, actual_y)
 
-        actual_X = np.array([point['X'] for point in icp_points])
-        actual_Y = np.array([point['Y'] for point in icp_points])
+        actual_X, actual_Y = icp_points.X, icp_points.Y
         rmse_X_backward, rmse_Y_backward = polynomial.rmse(predicted_x_backward, predicted_y_backward, actual_X, actual_Y)
 
         self.show_quiver_plots(icp_points, predicted_x_forward, predicted_y_forward, predicted_x_backward, predicted_y_backward)
         self.project.set_gt_icp(actual_X, actual_Y, actual_x, actual_y)
+
+        # Leave-one-out check of the GCPs themselves, from the same fit
+        diagnostics = polynomial.residual_diagnostics(forward=True)
+        suspects = np.union1d(diagnostics["blunders"], polynomial.residual_diagnostics(forward=False)["blunders"])
+        loo_x, loo_y = diagnostics["loo_rmse"]
+        gcp_report = f"<br><br><b>GCP Leave-One-Out RMSE (forward):</b><br>x: {loo_x:.4f}, y: {loo_y:.4f}"
+        if len(suspects):
+            suspect_ids = ", ".join(str(i) for i in gcp_points.ids[suspects])
+            gcp_report += f"<br><b>Suspect GCPs</b> (|studentized residual| &gt; 3): {suspect_ids}"
+
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle("Evaluation Results")
         msg_box.setText(
@@ -549,6 +505,7 @@ class ToolBoxMainWindow(QMainWindow):
             f"RMSE (X): {rmse_X_forward:.4f}, RMSE (Y): {rmse_Y_forward:.4f}<br><br>"
             f"<b>Backward Transformation:</b><br>"
             f"RMSE (X): {rmse_X_backward:.4f}, RMSE (Y): {rmse_Y_backward:.4f}"
+            f"{gcp_report}"
         )
         msg_box.exec()
         
@@ -558,10 +515,8 @@ class ToolBoxMainWindow(QMainWindow):
         self.project.rmse_Y_forward = rmse_Y_forward
         
         ##### Recomputing on GCPS for pointwise operations
-        actual_x_gcp = np.array([point['x'] for point in gcp_points])
-        actual_y_gcp = np.array([point['y'] for point in gcp_points])
-        actual_X_gcp = np.array([point['X'] for point in gcp_points])
-        actual_Y_gcp = np.array([point['Y'] for point in gcp_points])
+        actual_x_gcp, actual_y_gcp = gcp_points.x, gcp_points.y
+        actual_X_gcp, actual_Y_gcp = gcp_points.X, gcp_points.Y
         
         predicted_x_forward, predicted_y_forward = polynomial.evaluate(
             (coeffs_x_forward, coeffs_y_forward), gcp_points, forward=True
@@ -575,6 +530,74 @@ class ToolBoxMainWindow(QMainWindow):
                                         predicted_x_forward, actual_x_gcp, predicted_y_forward, actual_y_gcp)
 
 
+    def perform_degree_sweep(self):
+        """
+        Rank polynomial degrees 1..k for the forward model in a background thread and
+        move the degree slider to the best one.
+        """
+        points = self.get_points()
+        gcp_points, icp_points = points.gcps(), points.icps()
+        if not gcp_points:
+            QMessageBox.warning(self, "Warning", "No GCP points for regression.")
+            return
+
+        criteria = {"BIC": "bic", "AIC": "aic", "Leave-one-out RMSE": "loo_rmse"}
+        if icp_points:
+            criteria["ICP RMSE"] = "icp_rmse"
+        criterion, ok = QInputDialog.getItem(
+            self, "Input", "Rank degrees by:", list(criteria), 0, False
+        )
+        if not ok:
+            return
+        max_degree, ok = QInputDialog.getInt(
+            self, "Input", "Highest degree to try:", 6, 1, self.degree_slider.maximum()
+        )
+        if not ok:
+            return
+
+        self.degree_sweep_criterion = criterion
+        self.degree_sweep_worker = DegreeSweepWorker(gcp_points, icp_points, max_degree, criteria[criterion])
+        self.degree_sweep_thread = QThread()
+        self.degree_sweep_worker.moveToThread(self.degree_sweep_thread)
+
+        self.degree_sweep_thread.started.connect(self.degree_sweep_worker.run)
+        self.degree_sweep_worker.finished.connect(self.degree_sweep_thread.quit)
+        self.degree_sweep_worker.finished.connect(self.degree_sweep_worker.deleteLater)
+        self.degree_sweep_thread.finished.connect(self.degree_sweep_thread.deleteLater)
+        self.degree_sweep_worker.error.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"Degree selection failed: {message}")
+        )
+        self.degree_sweep_worker.swept.connect(self.show_degree_sweep)
+
+        self.degree_sweep_thread.start()
+
+    def show_degree_sweep(self, results):
+        """
+        Show the ranked degree table and apply the best degree.
+        """
+        if not results:
+            QMessageBox.warning(self, "Warning", "Not enough GCPs to fit any degree.")
+            return
+
+        def rmse(value):
+            return "-" if value is None else f"{value[0]:.4f} / {value[1]:.4f}"
+
+        rows = "".join(
+            f"<tr><td>{rank}</td><td>{r['degree']}</td><td>{r['terms']}</td>"
+            f"<td>{rmse(r['gcp_rmse'])}</td><td>{rmse(r['loo_rmse'])}</td><td>{rmse(r['icp_rmse'])}</td>"
+            f"<td>{r['aic']:.1f}</td><td>{r['bic']:.1f}</td></tr>"
+            for rank, r in enumerate(results, start=1)
+        )
+        best = results[0]["degree"]
+        self.degree_slider.setValue(best)
+        QMessageBox.information(
+            self, "Degree Selection",
+            f"<b>Degrees ranked by {self.degree_sweep_criterion}</b> (forward model, x / y)<br><br>"
+            f"<table border='1' cellpadding='3'><tr><th>#</th><th>Degree</th><th>Terms</th>"
+            f"<th>GCP RMSE</th><th>LOO RMSE</th><th>ICP RMSE</th><th>AIC</th><th>BIC</th></tr>"
+            f"{rows}</table><br>Degree set to <b>{best}</b>."
+        )
+
     def update_displacement_values(self, predicted_X, actual_X, predicted_Y, actual_Y,
                                          predicted_x, actual_x, predicted_y, actual_y):
         """
@@ -597,14 +620,12 @@ class ToolBoxMainWindow(QMainWindow):
 
         if show_rmse:
             # Compute RMSE for forward transformation
-            true_x_forward = np.array([point['x'] for point in icp_points])
-            true_y_forward = np.array([point['y'] for point in icp_points])
+            true_x_forward, true_y_forward = icp_points.x, icp_points.y
             rmse_X_forward = np.sqrt(np.mean((predicted_x_forward - true_x_forward) ** 2))
             rmse_Y_forward = np.sqrt(np.mean((predicted_y_forward - true_y_forward) ** 2))
 
             # Compute RMSE for backward transformation
-            true_x_backward = np.array([point['X'] for point in icp_points])
-            true_y_backward = np.array([point['Y'] for point in icp_points])
+            true_x_backward, true_y_backward = icp_points.X, icp_points.Y
             rmse_X_backward = np.sqrt(np.mean((predicted_x_backward - true_x_backward) ** 2))
             rmse_Y_backward = np.sqrt(np.mean((predicted_y_backward - true_y_backward) ** 2))
 
@@ -657,15 +678,16 @@ class ToolBoxMainWindow(QMainWindow):
         # Create a QLabel to display the plots
         label = QLabel(dialog)
 
+        import matplotlib.pyplot as plt
+
         # Create the figure for the plots
         fig, axes = plt.subplots(1, 2, figsize=(15, 8))
         fig.patch.set_facecolor('#2E2E2E')  # Dark gray background for the figure
 
         # Forward transformation plot
-        x_forward = [point['x'] for point in icp_points]
-        y_forward = [point['y'] for point in icp_points]
-        u_forward = predicted_x_forward - np.array(x_forward)
-        v_forward = predicted_y_forward - np.array(y_forward)
+        x_forward, y_forward = icp_points.x, icp_points.y
+        u_forward = predicted_x_forward - x_forward
+        v_forward = predicted_y_forward - y_forward
 
         image = self.image_viewer.pixmap.toImage()
         self.image = image 
@@ -681,10 +703,9 @@ class ToolBoxMainWindow(QMainWindow):
         axes[0].grid(color='gray', linestyle='--', linewidth=0.5)
 
         # Backward transformation plot
-        x_backward = [point['X'] for point in icp_points]
-        y_backward = [point['Y'] for point in icp_points]
-        u_backward = predicted_x_backward - np.array(x_backward)
-        v_backward = predicted_y_backward - np.array(y_backward)
+        x_backward, y_backward = icp_points.X, icp_points.Y
+        u_backward = predicted_x_backward - x_backward
+        v_backward = predicted_y_backward - y_backward
 
         axes[1].quiver(x_backward, y_backward, u_backward, v_backward, angles='xy', scale_units='xy', scale=1, color='orange')
         axes[1].set_title("Backward Transformation", color='white')
@@ -766,6 +787,7 @@ class ToolBoxMainWindow(QMainWindow):
             return
 
         self.image_scene.clear()
+        self.point_layer = None
         self.image_viewer.set_pixmap(pixmap)
 
         pixmap_item = QGraphicsPixmapItem(pixmap)
@@ -833,10 +855,12 @@ class ToolBoxMainWindow(QMainWindow):
         # Radio buttons for method selection
         radio_ldw = QRadioButton("LDW (Local Distance Weighted)")
         radio_mq = QRadioButton("MQ (Multiquadratic)")
+        radio_csrbf = QRadioButton("CSRBF (Compactly Supported RBF, for large GCP sets)")
         radio_mq.setChecked(True)  # Default selection
 
         layout.addWidget(radio_ldw)
         layout.addWidget(radio_mq)
+        layout.addWidget(radio_csrbf)
 
         # Label and slider for selecting R value
         r_label = QLabel("Select R value: 1")
@@ -873,7 +897,7 @@ class ToolBoxMainWindow(QMainWindow):
             return  # User canceled
 
         # Determine selected method
-        method = "LDW" if radio_ldw.isChecked() else "MQ"
+        method = "LDW" if radio_ldw.isChecked() else "CSRBF" if radio_csrbf.isChecked() else "MQ"
         r = r_values[slider.value()] if method == "LDW" else None
 
         # Initialize the Pointwise computation
@@ -882,6 +906,8 @@ class ToolBoxMainWindow(QMainWindow):
 
         if method == "MQ":
             icp_dx, icp_dy, icp_dX, icp_dY = pointwise.multiquadratic()
+        elif method == "CSRBF":
+            icp_dx, icp_dy, icp_dX, icp_dY = pointwise.csrbf()
         elif method == "LDW":
             icp_dx, icp_dy, icp_dX, icp_dY= pointwise.LDW(n=4, r=r)
             
@@ -902,6 +928,8 @@ class ToolBoxMainWindow(QMainWindow):
         gcp_points = self.get_gcp_points()
         icp_points = self.get_icp_points()
 
+        from core.piecewise import SplitLineWindow
+
         # Create the line-split dialog
         dialog = SplitLineWindow(
             qpixmap=self.image_viewer.pixmap, 
@@ -954,34 +982,22 @@ class ToolBoxMainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "No ICP points available.")
             return
 
-        def get_region(px, py):
-            region = 0
+        def get_region(points):
+            region = np.zeros(len(points), dtype=np.int64)
             for line in self.lines:
                 x1, y1, x2, y2 = line
-                sign = self._side_of_line(px, py, x1, y1, x2, y2)
-                if sign < 0:
-                    region += 1
+                region += self._side_of_line(points.x, points.y, x1, y1, x2, y2) < 0
             return region
 
-        gcp_regions = {}
-        icp_regions = {}
-
-        for gcp in gcp_points:
-            region = get_region(gcp["x"], gcp["y"])
-            if region not in gcp_regions:
-                gcp_regions[region] = []
-            gcp_regions[region].append(gcp)
-
-        for icp in icp_points:
-            region = get_region(icp["x"], icp["y"])
-            if region not in icp_regions:
-                icp_regions[region] = []
-            icp_regions[region].append(icp)
+        gcp_region = get_region(gcp_points)
+        icp_region = get_region(icp_points)
+        gcp_regions = {int(region): gcp_points[gcp_region == region] for region in np.unique(gcp_region)}
+        icp_regions = {int(region): icp_points[icp_region == region] for region in np.unique(icp_region)}
 
         text_lines = ["<b>Split Line Regression Results</b><br>"]
         for region in sorted(gcp_regions.keys()):
             gcp_list = gcp_regions[region]
-            icp_list = icp_regions.get(region, [])
+            icp_list = icp_regions.get(region, PointSet())
             if len(gcp_list) < 2 or len(icp_list) < 1:
                 text_lines.append(
                     f"<b>Region {region}</b>: Not enough GCP/ICP points for regression.<br><br>"
@@ -1034,12 +1050,10 @@ class ToolBoxMainWindow(QMainWindow):
         px_fwd, py_fwd = poly.evaluate((fx, fy), icp_list, forward=True)
         px_bwd, py_bwd = poly.evaluate((bx, by), icp_list, forward=False)
 
-        actual_x = np.array([p["x"] for p in icp_list])
-        actual_y = np.array([p["y"] for p in icp_list])
+        actual_x, actual_y = icp_list.x, icp_list.y
         rmseX_fwd, rmseY_fwd = poly.rmse(px_fwd, py_fwd, actual_x, actual_y)
 
-        actual_X = np.array([p["X"] for p in icp_list])
-        actual_Y = np.array([p["Y"] for p in icp_list])
+        actual_X, actual_Y = icp_list.X, icp_list.Y
         rmseX_bwd, rmseY_bwd = poly.rmse(px_bwd, py_bwd, actual_X, actual_Y)
 
         return (rmseX_fwd, rmseY_fwd), (rmseX_bwd, rmseY_bwd)
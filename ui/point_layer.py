@@ -0,0 +1,201 @@
+import numpy as np
+from PySide6.QtCore import Qt, QRectF, QTimer
+from PySide6.QtGui import QPixmap, QPen, QColor, QFont, QImage, QPainter, QTransform
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsPixmapItem
+
+
+GCP_PIN = "ui/icon/bluepin.png"
+ICP_PIN = "ui/icon/redpin.png"
+PIN_SIZE = 300
+
+_pin_cache = {}
+
+
+def pin_pixmap(icon_path, size=PIN_SIZE):
+    """
+    Load and scale a pin icon once; every point on the layer shares the cached pixmap.
+    """
+    key = (icon_path, size)
+    if key not in _pin_cache:
+        pixmap = QPixmap(icon_path)
+        if pixmap.isNull():
+            print(f"Failed to load icon from path: {icon_path}")
+        else:
+            pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        _pin_cache[key] = pixmap
+    return _pin_cache[key]
+
+
+def pixmap_to_argb(pixmap):
+    """
+    Copy a pixmap into a (height, width, 4) uint8 array of premultiplied ARGB32 pixels.
+    """
+    image = pixmap.toImage().convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    height, width = image.height(), image.width()
+    if height == 0 or width == 0:
+        return np.zeros((0, 0, 4), dtype=np.uint8)
+    return np.ndarray(shape=(height, width, 4), dtype=np.uint8, buffer=image.constBits(),
+                      strides=(image.bytesPerLine(), 4, 1)).copy()
+
+
+def compose_pins(height, width, stamps, chunk_pixels=1 << 22):
+    """
+    Stamp pin images into a (height, width, 4) premultiplied ARGB32 layer with NumPy.
+    `stamps` is a sequence of (pin array, top rows, left columns), painted in order; where
+    pins overlap, the pixel of the last one painted wins, except that opaque pixels win
+    over the antialiased fringe of another pin. Pins are clamped into the layer.
+    """
+    footprints = [np.nonzero(pin[..., 3]) for pin, _, _ in stamps]
+    per_pin = max([len(ys) for ys, _ in footprints] + [1])
+    palette = np.zeros((len(stamps), per_pin, 4), dtype=np.uint8)
+    total = sum(len(top) for _, top, _ in stamps)
+    span = total * per_pin
+    index_type = np.int32 if max(2 * span, height * width) < 2 ** 31 else np.int64
+
+    # Every layer pixel keeps the highest (opaque, pin order, pin pixel) code stamped onto it
+    owner = np.full(height * width, -1, dtype=index_type)
+    first_pin, starts = 0, []
+    for group, ((pin, top, left), (ys, xs)) in enumerate(zip(stamps, footprints)):
+        starts.append(first_pin)
+        palette[group, :len(ys)] = pin[ys, xs]
+        if len(ys) and len(top):
+            top = np.clip(top, 0, max(height - pin.shape[0], 0))
+            left = np.clip(left, 0, max(width - pin.shape[1], 0))
+            corners = (top * width + left).astype(index_type)
+            offsets = (ys * width + xs).astype(index_type)
+            pixels = (np.arange(len(ys)) + span * (pin[ys, xs, 3] >= 128)).astype(index_type)
+            per_chunk = max(1, chunk_pixels // len(ys))
+            for start in range(0, len(top), per_chunk):
+                chunk = corners[start:start + per_chunk]
+                order = np.arange(first_pin + start, first_pin + start + len(chunk), dtype=index_type)
+                np.maximum.at(owner, (chunk[:, None] + offsets).ravel(),
+                              (order[:, None] * per_pin + pixels).ravel())
+        first_pin += len(top)
+
+    layer = np.zeros((height * width, 4), dtype=np.uint8)
+    painted = np.flatnonzero(owner >= 0)
+    codes = owner[painted] % span
+    groups = np.searchsorted(starts, codes // per_pin, side="right") - 1
+    layer[painted] = palette[groups, codes % per_pin]
+    return layer.reshape(height, width, 4)
+
+
+class PointLayerItem(QGraphicsItem):
+    """
+    A single scene item that shows every tie point of a PointSet.
+    It replaces one QGraphicsPixmapItem plus one QLabel proxy widget per point: the pins
+    (red for ICPs, blue for GCPs) and their id labels are composed into one pre-rendered
+    layer, shown by a child QGraphicsPixmapItem and re-rendered only when the points or
+    the zoom level change. A repaint makes no per-point Python calls; `paint` only
+    watches the zoom level.
+    """
+
+    # Above this many points the id labels are skipped; they would be unreadable.
+    MAX_LABELS = 2000
+    # Labels smaller than this on the layer are skipped as well.
+    MIN_LABEL_PIXELS = 4
+    # Room to the right of the rightmost pin for its id label.
+    LABEL_MARGIN = 64
+    # Longest side of the pre-rendered layer, in layer pixels.
+    MAX_LAYER_SIDE = 4096
+
+    def __init__(self, points, parent=None):
+        super().__init__(parent)
+        self.points = points
+        self.icp_pixmap = pin_pixmap(ICP_PIN)
+        self.gcp_pixmap = pin_pixmap(GCP_PIN)
+        self.label_pen = QPen(QColor("red"))
+        self.label_font = QFont()
+        self.label_font.setPixelSize(10)
+
+        self.pin_item = QGraphicsPixmapItem(self)
+        self.pin_item.setTransformationMode(Qt.SmoothTransformation)
+        self._cell = None
+        self._wanted_cell = None
+        self._bounds = self._compute_bounds()
+        self._render_layer()
+
+    def _compute_bounds(self):
+        if len(self.points) == 0:
+            return QRectF()
+        half_w = max(self.icp_pixmap.width(), self.gcp_pixmap.width()) / 2 + 1
+        half_h = max(self.icp_pixmap.height(), self.gcp_pixmap.height()) / 2 + 1
+        x, y = np.floor(self.points.x), np.floor(self.points.y)
+        return QRectF(x.min() - half_w, y.min() - half_h,
+                      x.max() - x.min() + 2 * half_w + self.LABEL_MARGIN, y.max() - y.min() + 2 * half_h)
+
+    def _layer_cell(self, view_scale=None):
+        """
+        Scene pixels per layer pixel: a power of two no coarser than the view needs,
+        bounded so the layer stays within MAX_LAYER_SIDE.
+        """
+        side = max(self._bounds.width(), self._bounds.height(), 1.0)
+        cell = side / self.MAX_LAYER_SIDE
+        if view_scale:
+            cell = max(cell, 2.0 ** np.floor(np.log2(1.0 / view_scale)))
+        return float(2.0 ** np.ceil(np.log2(max(cell, 1.0))))
+
+    def _render_layer(self):
+        """
+        Compose pins and labels at the wanted resolution and hand them to the pixmap child.
+        """
+        self._wanted_cell = self._wanted_cell or self._layer_cell()
+        cell = self._cell = self._wanted_cell
+        if len(self.points) == 0:
+            self.pin_item.setPixmap(QPixmap())
+            return
+
+        origin_x, origin_y = self._bounds.left(), self._bounds.top()
+        height = int(np.ceil(self._bounds.height() / cell))
+        width = int(np.ceil(self._bounds.width() / cell))
+        # Pins are anchored at the integer pixel under the point, as the per-point items were.
+        x = np.floor(self.points.x).astype(np.int64)
+        y = np.floor(self.points.y).astype(np.int64)
+        icp = self.points.icp
+
+        stamps = []
+        for icon, full, mask in ((GCP_PIN, self.gcp_pixmap, ~icp), (ICP_PIN, self.icp_pixmap, icp)):
+            pin = pixmap_to_argb(pin_pixmap(icon, max(1, int(round(PIN_SIZE / cell)))))
+            top = np.round((y[mask] - full.height() // 2 - origin_y) / cell).astype(np.int64)
+            left = np.round((x[mask] - full.width() // 2 - origin_x) / cell).astype(np.int64)
+            stamps.append((pin, top, left))
+        layer = compose_pins(height, width, stamps)
+
+        # The QImage borrows the layer buffer; fromImage copies it into the pixmap
+        image = QImage(layer.data, width, height, width * 4,
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        if len(self.points) <= self.MAX_LABELS and self.label_font.pixelSize() / cell >= self.MIN_LABEL_PIXELS:
+            painter = QPainter(image)
+            painter.setPen(self.label_pen)
+            painter.setFont(self.label_font)
+            painter.setTransform(QTransform(1 / cell, 0, 0, 1 / cell, -origin_x / cell, -origin_y / cell))
+            ascent = painter.fontMetrics().ascent()
+            for px, py, pid in zip(x.tolist(), y.tolist(), self.points.ids.tolist()):
+                painter.drawText(px + 5, py - 5 + ascent, str(pid))
+            painter.end()
+
+        self.pin_item.setPixmap(QPixmap.fromImage(image))
+        self.pin_item.setPos(origin_x, origin_y)
+        self.pin_item.setScale(cell)
+
+    def refresh(self):
+        """Re-render the layer after the points or their ICP flags changed in place."""
+        self._render_layer()
+        self.update()
+
+    def set_points(self, points):
+        self.prepareGeometryChange()
+        self.points = points
+        self._bounds = self._compute_bounds()
+        self._wanted_cell = None
+        self.refresh()
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        # A zoom change re-renders the layer once, outside of painting
+        wanted = self._layer_cell(painter.worldTransform().m11())
+        if len(self.points) and wanted != self._cell and wanted != self._wanted_cell:
+            self._wanted_cell = wanted
+            QTimer.singleShot(0, self.refresh)
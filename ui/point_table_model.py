@@ -0,0 +1,90 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+
+from core.points import PointSet
+
+
+class PointTableModel(QAbstractTableModel):
+    """
+    Table model over a PointSet.
+    Cells are formatted on demand when the view asks for them, so loading a point file
+    costs one array parse instead of one QTableWidgetItem per cell. Column 0 is the
+    point id, columns 1-5 are x, y, X, Y, Z and column 6 is the checkable ICP flag.
+    """
+
+    HEADERS = ["Idx", "x", "y", "X", "Y", "Z", "ICP"]
+    ICP_COLUMN = 6
+
+    # Emitted with (row, is_icp) whenever a point's ICP flag changes.
+    icpChanged = Signal(int, bool)
+
+    def __init__(self, points=None, parent=None):
+        super().__init__(parent)
+        self.points = points if points is not None else PointSet()
+
+    def set_points(self, points):
+        """Replace the whole point set (one model reset instead of per-row inserts)."""
+        self.beginResetModel()
+        self.points = points
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.points)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if col == self.ICP_COLUMN:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if self.points.icp[row] else Qt.Unchecked
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if col == 0:
+                return str(self.points.ids[row])
+            return f"{self.points.data[row, col - 1]:.9f}"
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == self.ICP_COLUMN:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        row, col = index.row(), index.column()
+        if col == self.ICP_COLUMN and role == Qt.CheckStateRole:
+            return self.set_icp(row, Qt.CheckState(value) == Qt.Checked)
+        if role != Qt.EditRole or col == self.ICP_COLUMN:
+            return False
+        try:
+            if col == 0:
+                self.points.ids[row] = int(float(value))
+            else:
+                self.points.data[row, col - 1] = float(value)
+        except (TypeError, ValueError):
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def set_icp(self, row, is_icp):
+        """Set the ICP flag of one point and notify the view and any listeners."""
+        if bool(self.points.icp[row]) == is_icp:
+            return True
+        self.points.icp[row] = is_icp
+        index = self.index(row, self.ICP_COLUMN)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.icpChanged.emit(row, is_icp)
+        return True